@@ -0,0 +1,69 @@
+// Async drop-in for the schedule builders in ./calculations.js, backed by the Python
+// engine service (`uvicorn engine.api:app --port 8502`). Return shapes match the
+// client-side versions, so a page can switch by awaiting these instead. Pages use the
+// engine only when NEXT_PUBLIC_ENGINE_URL is set.
+
+export const ENGINE_ENABLED = Boolean(process.env.NEXT_PUBLIC_ENGINE_URL);
+const ENGINE_URL = process.env.NEXT_PUBLIC_ENGINE_URL || "http://127.0.0.1:8502";
+
+const postJson = async (path, body) => {
+  let response;
+  try {
+    response = await fetch(`${ENGINE_URL}${path}`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json", Accept: "application/json" },
+      body: JSON.stringify(body)
+    });
+  } catch {
+    return { error: `Engine service unreachable at ${ENGINE_URL}.` };
+  }
+  const payload = await response.json().catch(() => ({}));
+  if (!response.ok) {
+    return { error: payload.error || `Engine request failed (${response.status}).` };
+  }
+  return payload;
+};
+
+export const runEngineModel = (model, params) => postJson(`/api/${model}`, params);
+
+export const runEngineBatch = (requests) => postJson("/api/batch", { requests });
+
+export const createAmortizationSchedule = async (cost, startDateStr, endDateStr, licenseName) => {
+  const result = await runEngineModel("amortization", {
+    cost,
+    start_date: startDateStr,
+    end_date: endDateStr,
+    ...(licenseName ? { license_name: licenseName } : {})
+  });
+  if (result.error) return result;
+  return {
+    monthlyExpense: Math.round(result.meta.monthly_expense * 100) / 100,
+    totalMonths: result.meta.total_months,
+    schedule: result.schedule,
+    journals: result.journals,
+    payments: result.payments
+  };
+};
+
+export const createVariableRoyaltySchedule = async (streams, rate, startDateStr, licenseName) => {
+  const result = await runEngineModel("variable-royalty", {
+    streams,
+    rate,
+    start_date: startDateStr,
+    ...(licenseName ? { license_name: licenseName } : {})
+  });
+  if (result.error) return result;
+  return { schedule: result.schedule, journals: result.journals };
+};
+
+export const createMgHybridSchedule = async (streams, rate, mgAmount, startDateStr, licenseName) => {
+  const result = await runEngineModel("mg-hybrid", {
+    streams,
+    rate,
+    mg_amount: mgAmount,
+    start_date: startDateStr,
+    ...(licenseName ? { license_name: licenseName } : {})
+  });
+  if (result.error) return result;
+  return { schedule: result.schedule, journals: result.journals };
+};
@@ -16,6 +16,7 @@ import {
   formatScheduleCurrency,
   formatScheduleNumber
 } from "../../lib/calculations";
+import * as engine from "../../lib/engineClient";
 
 const LICENSE_NAME = "Content Licensing Agreement";
 const DEFAULT_COST = 200000000;
@@ -177,8 +178,10 @@ export default function ContentModulePage() {
     setMgStreams((prev) => prev.filter((_, idx) => idx !== index));
   };
 
-  const handleFixedCalculate = () => {
-    const result = createAmortizationSchedule(fixedCost, fixedStartDate, fixedEndDate);
+  const handleFixedCalculate = async () => {
+    const result = engine.ENGINE_ENABLED
+      ? await engine.createAmortizationSchedule(fixedCost, fixedStartDate, fixedEndDate, LICENSE_NAME)
+      : createAmortizationSchedule(fixedCost, fixedStartDate, fixedEndDate);
     if (result?.error) {
       setFixedError(result.error);
       setFixedResult(null);
@@ -188,7 +191,7 @@ export default function ContentModulePage() {
     setFixedResult(result);
   };
 
-  const handleVariableCalculate = () => {
+  const handleVariableCalculate = async () => {
     const streams = variableStreams.map((value) => Number(value || 0));
     if (!streams.length) {
       setVariableError("Enter at least one monthly stream value.");
@@ -201,7 +204,9 @@ export default function ContentModulePage() {
       return;
     }
 
-    const result = createVariableRoyaltySchedule(streams, variableRate, variableStartDate);
+    const result = engine.ENGINE_ENABLED
+      ? await engine.createVariableRoyaltySchedule(streams, variableRate, variableStartDate, LICENSE_NAME)
+      : createVariableRoyaltySchedule(streams, variableRate, variableStartDate);
     if (result?.error) {
       setVariableError(result.error);
       setVariableResult(null);
@@ -212,7 +217,7 @@ export default function ContentModulePage() {
     setVariableResult({ schedule: result.schedule, streams });
   };
 
-  const handleMgCalculate = () => {
+  const handleMgCalculate = async () => {
     const streams = mgStreams.map((value) => Number(value || 0));
     if (!streams.length) {
       setMgError("Enter at least one monthly stream value.");
@@ -225,7 +230,9 @@ export default function ContentModulePage() {
       return;
     }
 
-    const result = createMgHybridSchedule(streams, mgRate, mgAmount, mgStartDate);
+    const result = engine.ENGINE_ENABLED
+      ? await engine.createMgHybridSchedule(streams, mgRate, mgAmount, mgStartDate, LICENSE_NAME)
+      : createMgHybridSchedule(streams, mgRate, mgAmount, mgStartDate);
     if (result?.error) {
       setMgError(result.error);
       setMgResult(null);
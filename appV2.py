@@ -1,8 +1,33 @@
+import os
+
 import streamlit as st
 import pandas as pd
-from dateutil.relativedelta import relativedelta
-import io
-import datetime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from engine.calculations import (
+    DEFAULT_COST, DEFAULT_START_DATE, DEFAULT_END_DATE, LICENSE_NAME, MG_DEFAULT, RATE_DEFAULT,
+    create_amortization_summary_df, generate_amortization_journals, parse_streams_input,
+    create_excel_report, create_basic_excel_report, excel_report_file_name, basic_report_file_name,
+)
+from engine.fx import REPORTING_CURRENCY, available_currencies, translate_schedule, translate_journals
+from engine.validation import validate_batch
+from engine.runner import run_model
+from engine.result_cache import ResultCache
+from engine.shared_results import SharedResultStore
+from engine.licensor import create_licensor_schedule, generate_intercompany_journals
+from engine.rate_cards import parse_tiers_input
+from engine.rollforward import create_rollforward, rollforward_summary
+from engine.schedule_diff import diff_schedules, diff_journals, delta_journals
+from engine.contract_import import (
+    read_contract_file, file_error, validate_contracts, portfolio_summary, contract_request, portfolio_journals,
+)
+from engine.cash_forecast import PAYMENT_TERMS, FREQUENCIES, forecast_cash, forecast_summary
+from engine.schedule_models import SCHEDULE_MODELS
+from engine.depreciation import (
+    ERROR_COLUMNS as ASSET_ERROR_COLUMNS, DEPRECIATION_METHODS, DEFAULT_DB_FACTOR, CAPITALIZATION_THRESHOLD, MIN_BENEFIT_MONTHS,
+    create_depreciation_schedule, generate_depreciation_journals, validate_asset_register,
+    depreciate_register, register_summary, classify_spend, spend_to_register,
+)
 
 st.set_page_config(
     page_title="Interactive Technical Accounting Guide",
@@ -10,585 +35,258 @@ st.set_page_config(
     layout="wide"
 )
 
-# --- CONFIGURATION (You can adjust these defaults) ---
-DEFAULT_COST = 200_000_000.00
-DEFAULT_START_DATE = datetime.date(2020, 12, 1)
-DEFAULT_END_DATE = datetime.date(2023, 12, 31)
-LICENSE_NAME = "Content Licensing Agreement"
-MG_DEFAULT = 500_000.00
-RATE_DEFAULT = 0.005 # $0.005 per stream
+STYLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "styles.css")
+
+# The scenarios every session opens with; computed once per server and shared.
+DEFAULT_STREAMS = [1000000, 1200000, 950000, 1100000]
+DEFAULT_SCENARIOS = [
+    ('amortization', {'cost': DEFAULT_COST, 'start_date': DEFAULT_START_DATE.strftime('%Y-%m-%d'),
+                      'end_date': DEFAULT_END_DATE.strftime('%Y-%m-%d')}),
+    ('variable-royalty', {'streams': DEFAULT_STREAMS, 'rate': RATE_DEFAULT,
+                          'start_date': DEFAULT_START_DATE.strftime('%Y-%m-%d')}),
+    ('mg-hybrid', {'streams': DEFAULT_STREAMS, 'rate': RATE_DEFAULT, 'mg_amount': MG_DEFAULT,
+                   'start_date': DEFAULT_START_DATE.strftime('%Y-%m-%d')}),
+]
+
+
+@st.cache_resource(show_spinner=False)
+def shared_results():
+    """One result store per server process, backed by the on-disk cache and pre-warmed with the defaults."""
+    store = SharedResultStore(ResultCache())
+    for model, params in DEFAULT_SCENARIOS:
+        store.pin(model, params, run_model)
+    return store
+
+
+def get_result(model, params, slot):
+    """Runs a model through the shared store; identical terms from any session reuse one result."""
+    ctx = get_script_run_ctx()
+    store = shared_results()
+    if ctx and 'result_store_handle' not in st.session_state:
+        # Session state is dropped when the session ends, which releases its shared results.
+        st.session_state['result_store_handle'] = store.session_handle(ctx.session_id)
+    return store.get_or_compute(
+        model, params, run_model, session_id=ctx.session_id if ctx else None, slot=slot
+    )
 
 
 # ==============================================================================
 # GLOBAL STYLE (STREAMLIT THEME)
 # ==============================================================================
 
-def apply_global_styles():
-    """Injects custom CSS to improve Streamlit layout and typography."""
-    st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Fraunces:wght@400;600;700&family=Space+Grotesk:wght@400;500;600&display=swap');
-
-    :root {
-        --ink: #1a1a1a;
-        --subtle: #4a4a4a;
-        --accent: #0d6b5f;
-        --accent-2: #f08a5b;
-        --accent-3: #1f4e5f;
-        --panel: #ffffff;
-        --soft: #f2efe9;
-        --border: #e5dfd6;
-        --shadow: 0 12px 30px rgba(0, 0, 0, 0.08);
-    }
-
-    html, body, [class*="stApp"] {
-        font-family: "Space Grotesk", "Segoe UI", sans-serif;
-        color: var(--ink);
-        background:
-            radial-gradient(circle at 10% 10%, rgba(208, 226, 220, 0.55), transparent 40%),
-            radial-gradient(circle at 90% 5%, rgba(248, 226, 207, 0.6), transparent 35%),
-            linear-gradient(135deg, #f6f3ee 0%, #eef5f3 100%);
-    }
-
-    [data-testid="stAppViewContainer"] {
-        background: transparent;
-    }
-
-    [data-testid="stHeader"] {
-        background: transparent;
-    }
-
-    [data-testid="stSidebar"] {
-        background: linear-gradient(180deg, #0e1411 0%, #0b1b17 100%);
-        border-right: 1px solid #1a2a24;
-    }
-
-    [data-testid="stSidebar"] * {
-        color: #f4f1ea;
-    }
-
-    h1, h2, h3 {
-        font-family: "Fraunces", "Times New Roman", serif;
-        letter-spacing: 0.2px;
-    }
-
-    h1 {
-        font-weight: 700;
-    }
+@st.cache_resource(show_spinner=False)
+def load_global_styles():
+    """Reads the stylesheet once per server process; reruns reuse the cached block."""
+    with open(STYLES_PATH, encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
 
-    h2, h3 {
-        font-weight: 600;
-    }
-
-    p, li, .stMarkdown {
-        color: var(--subtle);
-    }
 
-    .block-container {
-        padding-top: 2.5rem;
-        padding-bottom: 2.5rem;
-        max-width: 1200px;
-    }
-
-    .stInfo, .stSuccess, .stWarning, .stError {
-        border-radius: 14px;
-        border: 1px solid var(--border);
-        box-shadow: var(--shadow);
-    }
-
-    .app-hero {
-        background: rgba(255, 255, 255, 0.9);
-        border-radius: 24px;
-        border: 1px solid var(--border);
-        padding: 2.5rem 2.8rem;
-        box-shadow: var(--shadow);
-        margin-bottom: 2rem;
-        position: relative;
-        overflow: hidden;
-        animation: rise 0.6s ease both;
-    }
-
-    .app-hero::after {
-        content: "";
-        position: absolute;
-        top: -80px;
-        right: -80px;
-        width: 200px;
-        height: 200px;
-        background: radial-gradient(circle, rgba(15, 107, 95, 0.18), transparent 60%);
-        border-radius: 50%;
-    }
-
-    .hero-kicker {
-        text-transform: uppercase;
-        letter-spacing: 2.5px;
-        font-size: 0.75rem;
-        font-weight: 600;
-        color: var(--accent-3);
-        margin-bottom: 0.6rem;
-    }
-
-    .hero-title {
-        font-family: "Fraunces", "Times New Roman", serif;
-        font-size: clamp(2.2rem, 2.6vw, 3rem);
-        font-weight: 700;
-        margin-bottom: 0.75rem;
-    }
-
-    .hero-subtitle {
-        font-size: 1.05rem;
-        max-width: 720px;
-        color: var(--subtle);
-        margin-bottom: 1.6rem;
-    }
-
-    .app-badges {
-        display: flex;
-        flex-wrap: wrap;
-        gap: 0.6rem;
-    }
-
-    .app-badge {
-        background: rgba(13, 107, 95, 0.12);
-        border: 1px solid rgba(13, 107, 95, 0.25);
-        color: var(--accent);
-        padding: 0.35rem 0.8rem;
-        border-radius: 999px;
-        font-size: 0.8rem;
-        font-weight: 600;
-    }
-
-    .app-card-grid {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(220px, 1fr));
-        gap: 1.2rem;
-        margin-bottom: 2rem;
-    }
-
-    .app-card {
-        background: var(--panel);
-        border: 1px solid var(--border);
-        border-radius: 18px;
-        padding: 1.4rem;
-        box-shadow: var(--shadow);
-        min-height: 160px;
-        animation: rise 0.8s ease both;
-    }
-
-    .app-card h4 {
-        font-family: "Fraunces", "Times New Roman", serif;
-        margin-bottom: 0.4rem;
-    }
-
-    .app-card p {
-        margin-bottom: 0.2rem;
-    }
-
-    .sidebar-card {
-        background: rgba(255, 255, 255, 0.08);
-        border: 1px solid rgba(255, 255, 255, 0.12);
-        border-radius: 14px;
-        padding: 0.85rem 0.95rem;
-        margin-top: 0.6rem;
-        font-size: 0.85rem;
-    }
-
-    .stDataFrame, [data-testid="stTable"] {
-        background: var(--panel);
-        border-radius: 14px;
-        box-shadow: var(--shadow);
-        padding: 0.5rem;
-    }
-
-    [data-testid="stFileDownloadButton"] button,
-    .stButton>button {
-        background: var(--accent);
-        color: #ffffff;
-        border: none;
-        border-radius: 999px;
-        padding: 0.6rem 1.4rem;
-        font-weight: 600;
-        transition: transform 0.12s ease, box-shadow 0.12s ease;
-        box-shadow: 0 8px 18px rgba(13, 107, 95, 0.25);
-    }
-
-    [data-testid="stFileDownloadButton"] button:hover,
-    .stButton>button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 12px 24px rgba(13, 107, 95, 0.35);
-    }
-
-    .stTextInput input, .stNumberInput input, .stDateInput input, .stTextArea textarea, .stSelectbox div {
-        border-radius: 10px;
-        border: 1px solid var(--border);
-    }
-
-    hr {
-        border: none;
-        height: 1px;
-        background: linear-gradient(90deg, transparent, var(--border), transparent);
-    }
-
-    @keyframes rise {
-        from {
-            opacity: 0;
-            transform: translateY(12px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    </style>
-    """, unsafe_allow_html=True)
+def apply_global_styles():
+    """Injects custom CSS to improve Streamlit layout and typography."""
+    st.markdown(load_global_styles(), unsafe_allow_html=True)
 
 
 # ==============================================================================
-# A. CORE AMORTIZATION CALCULATION FUNCTIONS (Fixed Fee Model)
+# B. PAGE DEFINITIONS
 # ==============================================================================
 
-def create_amortization_schedule(cost, start_date_str, end_date_str):
-    """Calculates the Straight-Line Amortization Schedule and NBV."""
-    try:
-        start_date = pd.to_datetime(start_date_str)
-        end_date = pd.to_datetime(end_date_str)
-    except ValueError:
-        return 0, 0, pd.DataFrame(), "Invalid Date Format. Use YYYY-MM-DD."
-
-    diff = relativedelta(end_date, start_date)
-    total_months = diff.years * 12 + diff.months + 1 
-    if total_months <= 0:
-        return 0, 0, pd.DataFrame(), "End date must be after start date."
-        
-    monthly_expense = cost / total_months
-    
-    posting_dates = []
-    current_date = start_date
-    while current_date <= end_date:
-        posting_dates.append(current_date + pd.offsets.MonthEnd(0))
-        current_date += relativedelta(months=1)
-        
-    schedule_data = []
-    accumulated_amortization = 0.00
-    
-    for month_num, posting_date in enumerate(posting_dates):
-        expense_to_recognize = monthly_expense
-        
-        # Final month adjustment
-        if month_num == total_months - 1:
-            remaining_nbv = cost - accumulated_amortization
-            expense_to_recognize = remaining_nbv 
-
-        accumulated_amortization += expense_to_recognize
-        net_book_value = cost - accumulated_amortization
-        
-        schedule_data.append({
-            'Posting_Date': posting_date.strftime('%Y-%m-%d'),
-            'Amortization_Expense': round(expense_to_recognize, 2),
-            'Accumulated_Amortization': round(accumulated_amortization, 2),
-            'Net_Book_Value_NBV': round(net_book_value, 2)
-        })
-        
-    return monthly_expense, total_months, pd.DataFrame(schedule_data), None
-
-# Helper function for the Amortization tool output
-def create_amortization_summary_df(cost, term, rate):
-    """Creates the summary table for display, using comma formatting."""
-    summary_data = [
-        ("Total License Fee", f"${cost:,.2f}"),
-        ("Total Term (Months)", term),
-        ("Monthly Expense Recognition", f"${rate:,.2f}"),
-        ("Annual Expense Recognition", f"${rate*12:,.2f}")
-    ]
-    return pd.DataFrame(summary_data, columns=['Metric', 'Value'])
-
-# --- Journal Entry Generation (Shared Logic) ---
-def generate_amortization_journals(schedule_df, license_name, total_cost):
-    """Generates the initial prepaid JE and monthly expense JEs based on the input schedule_df size."""
-    all_entries = []
-    
-    if schedule_df.empty:
-        return pd.DataFrame()
-
-    formatted_total_cost = total_cost
-    initial_date = schedule_df['Posting_Date'].iloc[0]
-    
-    # 1. INITIAL PREPAID ENTRY 
-    all_entries.append({
-        'Date': initial_date, 'JE_Type': 'PREPAID', 'License': license_name,
-        'Account_Description': 'Prepaid Content Licensing', 'Account_Number': 14001, 'Debit': formatted_total_cost, 'Credit': 0.00
-    })
-    all_entries.append({
-        'Date': initial_date, 'JE_Type': 'PREPAID', 'License': license_name,
-        'Account_Description': 'Accounts Payable (Vendor Invoice)', 'Account_Number': 22611, 'Debit': 0.00, 'Credit': formatted_total_cost
-    })
-    
-    # 2. MONTHLY EXPENSE RECOGNITION ENTRIES 
-    for index, row in schedule_df.iterrows():
-        expense = row['Amortization_Expense']
-        date = row['Posting_Date']
-        
-        all_entries.append({
-            'Date': date, 'JE_Type': 'EXPENSE', 'License': license_name,
-            'Account_Description': 'Content Expense', 'Account_Number': 50011, 'Debit': expense, 'Credit': 0.00
-        })
-        all_entries.append({
-            'Date': date, 'JE_Type': 'EXPENSE', 'License': license_name,
-            'Account_Description': 'Prepaid Content Licensing', 'Account_Number': 14001, 'Debit': 0.00, 'Credit': expense
-        })
-        
-    return pd.DataFrame(all_entries)
-
-# --- NEW FUNCTION: Quarterly Payment Journal Generation ---
-def generate_quarterly_payment_journals(total_cost, start_date_str):
-    """Generates the quarterly JE for cash payment against the initial liability."""
-    
-    start_date = pd.to_datetime(start_date_str)
-    
-    end_date = pd.to_datetime(DEFAULT_END_DATE.strftime('%Y-%m-%d'))
-    diff = relativedelta(end_date, start_date)
-    total_months = diff.years * 12 + diff.months + 1 
-    
-    num_quarters = (total_months + 2) // 3
-    quarterly_payment_amount = total_cost / num_quarters
-    
-    payment_entries = []
-    
-    current_date = start_date
-    for i in range(num_quarters):
-        # Find the quarter-end date
-        accrual_date = start_date + relativedelta(months=(i + 1) * 3) + pd.offsets.MonthEnd(0)
-        
-        # Payment is Net 30 days after the accrual/quarter-end date
-        payment_date = accrual_date + relativedelta(days=30)
-        
-        payment = quarterly_payment_amount
-        
-        # Final adjustment to ensure full liability is cleared
-        if i == num_quarters - 1:
-            payment = total_cost - (quarterly_payment_amount * (num_quarters - 1))
-        
-        # 1. Debit Accounts Payable (Liability decreases)
-        payment_entries.append({
-            'Date': payment_date.strftime('%Y-%m-%d'), 'JE_Type': 'PAYMENT', 'License': LICENSE_NAME,
-            'Account_Description': 'Accounts Payable (Vendor Invoice)', 'Account_Number': 22611, 'Debit': payment, 'Credit': 0.00
-        })
-        
-        # 2. Credit Cash (Asset decreases)
-        payment_entries.append({
-            'Date': payment_date.strftime('%Y-%m-%d'), 'JE_Type': 'PAYMENT', 'License': LICENSE_NAME,
-            'Account_Description': 'Cash', 'Account_Number': 10000, 'Debit': 0.00, 'Credit': payment
-        })
-        
-    return pd.DataFrame(payment_entries)
-
-
-def parse_streams_input(streams_text):
-    """Parses a comma or newline separated list of stream counts."""
-    if not streams_text.strip():
-        return []
-    cleaned = streams_text.replace("\n", ",")
-    values = [v.strip() for v in cleaned.split(",") if v.strip()]
-    streams = []
-    for value in values:
-        if not value.replace("_", "").isdigit():
-            return []
-        streams.append(int(value.replace("_", "")))
-    return streams
-
-
-def create_variable_royalty_schedule(streams, rate, start_date_str):
-    """Creates a monthly schedule for variable royalty usage."""
-    if not streams:
-        return pd.DataFrame(), "Enter at least one monthly stream value."
-
-    start_date = pd.to_datetime(start_date_str)
-    schedule_data = []
-    accrued_total = 0.00
-
-    for month_index, stream_count in enumerate(streams):
-        posting_date = start_date + relativedelta(months=month_index) + pd.offsets.MonthEnd(0)
-        expense = stream_count * rate
-        accrued_total += expense
-        schedule_data.append({
-            'Posting_Date': posting_date.strftime('%Y-%m-%d'),
-            'Streams': stream_count,
-            'Royalty_Expense': round(expense, 2),
-            'Accrued_Payable': round(accrued_total, 2)
-        })
-
-    return pd.DataFrame(schedule_data), None
-
-
-def generate_variable_royalty_journals(schedule_df, license_name):
-    """Generates monthly accrual entries for variable royalties."""
-    if schedule_df.empty:
-        return pd.DataFrame()
-
-    entries = []
-    for _, row in schedule_df.iterrows():
-        expense = row['Royalty_Expense']
-        date = row['Posting_Date']
-        entries.append({
-            'Date': date, 'JE_Type': 'ROYALTY', 'License': license_name,
-            'Account_Description': 'Content Expense', 'Account_Number': 50011, 'Debit': expense, 'Credit': 0.00
-        })
-        entries.append({
-            'Date': date, 'JE_Type': 'ROYALTY', 'License': license_name,
-            'Account_Description': 'Accounts Payable (Royalty)', 'Account_Number': 22611, 'Debit': 0.00, 'Credit': expense
-        })
-
-    return pd.DataFrame(entries)
-
-
-def create_mg_hybrid_schedule(streams, rate, mg_amount, start_date_str):
-    """Creates a hybrid MG usage schedule with prepaid drawdown and overage."""
-    if not streams:
-        return pd.DataFrame(), "Enter at least one monthly stream value."
-    if mg_amount <= 0:
-        return pd.DataFrame(), "Minimum guarantee must be greater than zero."
-
-    start_date = pd.to_datetime(start_date_str)
-    schedule_data = []
-    remaining_prepaid = mg_amount
-    accrued_overage_total = 0.00
-
-    for month_index, stream_count in enumerate(streams):
-        posting_date = start_date + relativedelta(months=month_index) + pd.offsets.MonthEnd(0)
-        usage_expense = stream_count * rate
-        prepaid_applied = min(remaining_prepaid, usage_expense)
-        overage_expense = usage_expense - prepaid_applied
-        remaining_prepaid -= prepaid_applied
-        accrued_overage_total += overage_expense
-
-        schedule_data.append({
-            'Posting_Date': posting_date.strftime('%Y-%m-%d'),
-            'Streams': stream_count,
-            'Usage_Expense': round(usage_expense, 2),
-            'Prepaid_Amortization': round(prepaid_applied, 2),
-            'Overage_Expense': round(overage_expense, 2),
-            'Ending_Prepaid': round(remaining_prepaid, 2),
-            'Accrued_Overage': round(accrued_overage_total, 2)
-        })
-
-    return pd.DataFrame(schedule_data), None
-
-
-def generate_mg_hybrid_journals(schedule_df, license_name, mg_amount, start_date_str):
-    """Generates MG upfront entry and monthly expense/overage accruals."""
-    if schedule_df.empty:
-        return pd.DataFrame()
-
-    entries = []
-    initial_date = pd.to_datetime(start_date_str).strftime('%Y-%m-%d')
-
-    entries.append({
-        'Date': initial_date, 'JE_Type': 'MG_PREPAY', 'License': license_name,
-        'Account_Description': 'Prepaid Content (MG)', 'Account_Number': 14001, 'Debit': mg_amount, 'Credit': 0.00
-    })
-    entries.append({
-        'Date': initial_date, 'JE_Type': 'MG_PREPAY', 'License': license_name,
-        'Account_Description': 'Cash', 'Account_Number': 10000, 'Debit': 0.00, 'Credit': mg_amount
-    })
-
-    for _, row in schedule_df.iterrows():
-        date = row['Posting_Date']
-        prepaid_applied = row['Prepaid_Amortization']
-        overage_expense = row['Overage_Expense']
-
-        if prepaid_applied > 0:
-            entries.append({
-                'Date': date, 'JE_Type': 'MG_USAGE', 'License': license_name,
-                'Account_Description': 'Content Expense', 'Account_Number': 50011, 'Debit': prepaid_applied, 'Credit': 0.00
-            })
-            entries.append({
-                'Date': date, 'JE_Type': 'MG_USAGE', 'License': license_name,
-                'Account_Description': 'Prepaid Content (MG)', 'Account_Number': 14001, 'Debit': 0.00, 'Credit': prepaid_applied
-            })
-
-        if overage_expense > 0:
-            entries.append({
-                'Date': date, 'JE_Type': 'MG_OVERAGE', 'License': license_name,
-                'Account_Description': 'Content Expense', 'Account_Number': 50011, 'Debit': overage_expense, 'Credit': 0.00
-            })
-            entries.append({
-                'Date': date, 'JE_Type': 'MG_OVERAGE', 'License': license_name,
-                'Account_Description': 'Accounts Payable (Royalty)', 'Account_Number': 22611, 'Debit': 0.00, 'Credit': overage_expense
-            })
-
-    return pd.DataFrame(entries)
-
-
-def create_excel_report(summary_df, schedule_df, journal_df, payment_df, periods):
-    """Creates a multi-sheet Excel file in memory with formatted columns."""
-    
-    output = io.BytesIO()
-    
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        
-        def auto_fit_columns(df, sheet_name):
-            number_format = writer.book.add_format({'num_format': '#,##0.00'})
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-            worksheet = writer.sheets[sheet_name]
-            
-            for i, col in enumerate(df.columns):
-                max_len = max(df[col].astype(str).str.len().max(), len(col)) + 1
-                width = min(max(max_len, 12), 40)
-                worksheet.set_column(i, i, width)
-                
-                financial_cols = ['Amortization_Expense', 'Accumulated_Amortization', 'Net_Book_Value_NBV', 'Debit', 'Credit']
-                if col in financial_cols:
-                    worksheet.set_column(i, i, width, number_format)
-                elif sheet_name == '1. Deal Summary' and col == 'Value':
-                     if isinstance(df[col].iloc[0], str) and '$' in df[col].iloc[0]:
-                        worksheet.set_column(i, i, width, number_format) 
-
-        auto_fit_columns(summary_df, '1. Deal Summary')
-        auto_fit_columns(schedule_df, '2. Amortization Schedule')
-        auto_fit_columns(journal_df, '3. Monthly Accrual Entries')
-        auto_fit_columns(payment_df, '4. Quarterly Payment Schedule')
-        
-    output.seek(0)
-    
-    return output, f"Amortization_Report_{periods}M.xlsx"
-
-
-def create_basic_excel_report(summary_df, schedule_df, journal_df, report_name):
-    """Creates a multi-sheet Excel file in memory for non-amortization modules."""
-    output = io.BytesIO()
-
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+@st.cache_data(show_spinner="Validating contract file...")
+def load_contract_portfolio(data, file_name):
+    """Parses and validates an uploaded contract file once per distinct upload."""
+    raw_df, error_msg = read_contract_file(data, file_name)
+    if error_msg:
+        return pd.DataFrame(), file_error(error_msg), pd.DataFrame()
+    contracts_df, errors_df = validate_contracts(raw_df)
+    summary_df = portfolio_summary(contracts_df) if not contracts_df.empty else pd.DataFrame()
+    return contracts_df, errors_df, summary_df
+
+
+@st.cache_data(show_spinner="Building portfolio journals...")
+def load_portfolio_journals(contracts_df):
+    """Journals for every contract in an upload, built once and reused as forecast settings change."""
+    return portfolio_journals(contracts_df)
+
+
+@st.cache_data(show_spinner="Depreciating asset register...")
+def load_asset_register(data, file_name):
+    """Validates and depreciates an uploaded fixed-asset register once per distinct upload."""
+    raw_df, error_msg = read_contract_file(data, file_name)
+    if error_msg:
+        return pd.DataFrame(), file_error(error_msg, ASSET_ERROR_COLUMNS), pd.DataFrame(), pd.DataFrame()
+    register_df, errors_df = validate_asset_register(raw_df)
+    if register_df.empty:
+        return register_df, errors_df, pd.DataFrame(), pd.DataFrame()
+    schedule_df, _, error_msg = depreciate_register(register_df, journals=False)
+    if error_msg:
+        return pd.DataFrame(), errors_df, pd.DataFrame(), pd.DataFrame()
+    return register_df, errors_df, schedule_df, register_summary(register_df, schedule_df)
+
+
+def render_asset_register(register_df, schedule_df, summary_df, key):
+    """Shows a depreciated register: totals by method, one asset's schedule and CSV exports."""
+    st.success(f"Depreciated {len(register_df):,} assets ({len(schedule_df):,} schedule rows).")
+    st.dataframe(summary_df)
+
+    selected_id = st.selectbox("Asset", options=register_df['Asset_ID'], key=f"{key}_asset_select")
+    st.dataframe(schedule_df[schedule_df['Asset_ID'] == selected_id])
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "Download Depreciation Schedule (CSV)",
+            lambda: schedule_df.to_csv(index=False),  # Built only when clicked; registers exceed Excel's row limit.
+            "Depreciation_Schedule.csv",
+            "text/csv",
+            key=f"download-{key}-schedule",
+            on_click="ignore"
+        )
+    with col2:
+        st.download_button(
+            "Download Depreciation Journals (CSV)",
+            lambda: depreciate_register(register_df)[1].to_csv(index=False),
+            "Depreciation_Journals.csv",
+            "text/csv",
+            key=f"download-{key}-journals",
+            on_click="ignore"
+        )
 
-        def auto_fit_columns(df, sheet_name):
-            number_format = writer.book.add_format({'num_format': '#,##0.00'})
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-            worksheet = writer.sheets[sheet_name]
 
-            for i, col in enumerate(df.columns):
-                max_len = max(df[col].astype(str).str.len().max(), len(col)) + 1
-                width = min(max(max_len, 12), 40)
-                worksheet.set_column(i, i, width)
+def rate_card_inputs(key_prefix):
+    """Optional tiered/escalating rate card; returns runner params (empty dict for the flat rate)."""
+    with st.expander("Tiered / Escalating Rate Card (optional)"):
+        use_tiers = st.checkbox("Price streams with a rate card instead of the flat rate", key=f"{key_prefix}_use_tiers")
+        tiers_text = st.text_area(
+            "Tiers (volume floor:rate, comma or newline separated)",
+            value="0:0.005, 1000000:0.004, 5000000:0.003",
+            key=f"{key_prefix}_tiers_text"
+        )
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            basis = st.selectbox("Volume Basis", options=["period", "cumulative"], key=f"{key_prefix}_tier_basis")
+        with col2:
+            method = st.selectbox("Pricing Method", options=["graduated", "volume"], key=f"{key_prefix}_tier_method")
+        with col3:
+            escalator = st.number_input(
+                "Annual Escalator (%)", min_value=0.0, value=0.0, step=0.5, key=f"{key_prefix}_tier_escalator"
+            )
+    if not use_tiers:
+        return {}
+    return {
+        'tiers': parse_tiers_input(tiers_text),
+        'basis': basis, 'method': method, 'annual_escalator': escalator / 100,
+    }
 
-                if col in ['Royalty_Expense', 'Accrued_Payable', 'Usage_Expense', 'Prepaid_Amortization',
-                           'Overage_Expense', 'Ending_Prepaid', 'Accrued_Overage', 'Debit', 'Credit']:
-                    worksheet.set_column(i, i, width, number_format)
 
-        if not summary_df.empty:
-            auto_fit_columns(summary_df, '1. Summary')
-        if not schedule_df.empty:
-            auto_fit_columns(schedule_df, '2. Schedule')
-        if not journal_df.empty:
-            auto_fit_columns(journal_df, '3. Journal Entries')
+def render_validation(violations):
+    """Reports the result of the balancing and tie-out checks."""
+    if violations.empty:
+        st.success("Validation passed: journals balance and schedule balances tie out.")
+    else:
+        st.error(f"Validation found {len(violations)} issue(s) by contract and period.")
+        st.dataframe(violations)
 
-    output.seek(0)
 
-    safe_name = report_name.replace(" ", "_")
-    return output, f"{safe_name}_Report.xlsx"
+def render_licensor_side(schedule_df, upfront_amount=None, start_date_str=None, payment_df=None):
+    """Shows the licensing-out mirror of the deal: deferred revenue, revenue and receivable."""
+    st.subheader("Licensor Side (Licensing-Out Mirror)")
+    st.markdown("The same deal from the licensor's books: upfront fees sit in **Deferred Licensing Revenue (24001)** and are released to **Licensing Revenue (40011)**; usage above the MG accrues to **Accounts Receivable (12001)**.")
+    _, licensor_journals = generate_intercompany_journals(
+        schedule_df, LICENSE_NAME, upfront_amount, start_date_str, payment_df
+    )
+    st.dataframe(create_licensor_schedule(schedule_df))
+    st.dataframe(licensor_journals)
+
+
+def render_rollforward(journal_df, report_name, key, currencies=None):
+    """Shows the prepaid/payable rollforward derived from the journals, with an Excel export.
+
+    ``currencies`` (contract ID -> currency) splits the totals by currency for mixed portfolios.
+    """
+    st.subheader("Period-Close Rollforward")
+    st.markdown("Opening balance, additions, amortization, accruals, payments and closing balance by period for **Prepaid (14001)** and **Accounts Payable (22611)**.")
+    if journal_df.empty:
+        st.info("No journals to roll forward.")
+        return
+    first_date, last_date = pd.to_datetime(journal_df['Date'].min()).date(), pd.to_datetime(journal_df['Date'].max()).date()
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input("Rollforward From", value=first_date, key=f"{key}-start")
+    with col2:
+        end_date = st.date_input("Rollforward To", value=last_date, key=f"{key}-end")
+    if end_date < start_date:
+        st.error("Rollforward end date must be on or after the start date.")
+        return
+    rollforward_df = create_rollforward(journal_df, start_date, end_date)
+    if currencies is None:
+        st.dataframe(rollforward_summary(rollforward_df))
+    else:
+        contract_currency = rollforward_df['Contract'].map(currencies)
+        for currency in sorted(contract_currency.dropna().unique()):
+            st.markdown(f"**Totals ({currency})**")
+            st.dataframe(rollforward_summary(rollforward_df[contract_currency == currency]))
+    st.dataframe(rollforward_df)
+
+    st.download_button(
+        "Download Rollforward (Excel)",
+        lambda: create_basic_excel_report(rollforward_summary(rollforward_df), rollforward_df, pd.DataFrame(), report_name)[0],  # Workbook is built only when clicked.
+        basic_report_file_name(report_name),
+        "application/vnd.ms-excel",
+        key=key,
+        on_click="ignore"
+    )
 
 
-# ==============================================================================
-# B. PAGE DEFINITIONS
-# ==============================================================================
+def render_cash_forecast(journal_df, frequency='M', as_of=None, horizon_months=12):
+    """Shows projected cash outflows: every accrual to 22611 settled on its payment terms."""
+    st.subheader("Cash Forecast (Accrual to Cash)")
+    terms = ", ".join(f"{je_type}: {cycle} + {days} days" for je_type, (cycle, days) in PAYMENT_TERMS.items())
+    st.markdown(f"Accruals to **Accounts Payable (22611)** are paid on their payment terms ({terms}); lines already posted to **Cash (10000)** are taken as scheduled.")
+    forecast_df, error_msg = forecast_cash(journal_df, as_of, horizon_months, frequency)
+    if error_msg:
+        st.error(error_msg)
+        return
+    summary_df = forecast_summary(forecast_df)
+    st.bar_chart(summary_df.set_index('Period')['Total_Outflow'])
+    st.dataframe(summary_df)
+
+
+def render_run_diff(run_key, schedule_df, journal_df):
+    """Compares this run with the previous one in the session and shows only the lines that moved."""
+    previous = st.session_state.get(f"snapshot_{run_key}")
+    st.session_state[f"snapshot_{run_key}"] = (schedule_df, journal_df)
+    if previous is None:
+        return
+
+    st.subheader("Changes Since Previous Run")
+    schedule_changes = diff_schedules(previous[0], schedule_df)
+    journal_changes = diff_journals(previous[1], journal_df)
+    if schedule_changes.empty and journal_changes.empty:
+        st.info("No schedule or journal lines moved since the previous run.")
+        return
+    st.dataframe(schedule_changes)
+    st.markdown("**Delta Journals** (post these to move the previous run to this one)")
+    st.dataframe(delta_journals(journal_changes))
+
+
+def render_currency_translation(schedule_df, journal_df, currency):
+    """Shows the schedule and journals translated into the reporting currency."""
+    if currency == REPORTING_CURRENCY:
+        return
+
+    st.subheader(f"Reporting Currency Translation ({currency} → {REPORTING_CURRENCY})")
+    st.markdown("Expense flows translate at the monthly **average** rate; balances, prepayments and payments at the **month-end** rate.")
+
+    translated_schedule, error_msg = translate_schedule(schedule_df, currency)
+    if error_msg:
+        st.error(error_msg)
+        return
+    translated_journals, error_msg = translate_journals(journal_df, currency)
+    if error_msg:
+        st.error(error_msg)
+        return
+
+    st.dataframe(translated_schedule)
+    st.dataframe(translated_journals)
 
 def home_page():
     """Defines the content for the Home Page."""
@@ -664,9 +362,21 @@ def content_license_module():
         "Which contract structure applies?",
         options=["Fixed Fee (Straight-Line)", 
                  "Variable Royalty (Pure Usage)", 
-                 "Minimum Guarantee (Hybrid/Usage)"],
+                 "Minimum Guarantee (Hybrid/Usage)",
+                 "Portfolio Import (Excel/CSV)"],
         key="amortization_method_select" # Unique key for stability
     )
+
+    contract_currency = st.selectbox(
+        "Contract Currency",
+        options=available_currencies(),
+        key="contract_currency_select",
+        help=f"Amounts are entered in the contract currency and translated to {REPORTING_CURRENCY} for reporting."
+    )
+    show_licensor_side = st.checkbox(
+        "Also show the licensor side (licensing-out deal)",
+        key="show_licensor_side"
+    )
     
     st.markdown("---")
     
@@ -716,19 +426,22 @@ def content_license_module():
         
         if st.button("Calculate Schedule", key="calculate_fixed_button"):
             # Run the core calculation logic
-            rate, periods, schedule_df, error_msg = create_amortization_schedule(
-                cost_input, start_date_str, end_date_str
-            )
-            
+            result, error_msg = get_result('amortization', {
+                'cost': cost_input, 'start_date': start_date_str, 'end_date': end_date_str
+            }, slot="fixed")
+            if result:
+                rate, periods = result['meta']['monthly_expense'], result['meta']['total_months']
+
             if error_msg:
                 st.error(error_msg)
             elif periods > 0:
                 st.success(f"Calculation Complete: {periods} periods found.")
                 
                 # Generate JEs
+                schedule_df = result['schedule']
                 journal_df_preview = generate_amortization_journals(schedule_df.head(5), LICENSE_NAME, cost_input)
-                journal_df_full = generate_amortization_journals(schedule_df, LICENSE_NAME, cost_input)
-                payment_df = generate_quarterly_payment_journals(cost_input, start_date_str)
+                journal_df_full = result['journals']
+                payment_df = result['payments']
                 
                 # Display Results
                 st.markdown("### Summary Metrics")
@@ -765,16 +478,27 @@ def content_license_module():
                 payment_display_df['Debit'] = payment_display_df['Debit'].map('{:,.2f}'.format)
                 payment_display_df['Credit'] = payment_display_df['Credit'].map('{:,.2f}'.format)
                 st.dataframe(payment_display_df) # Use display_df here
+
+                render_validation(validate_batch(
+                    pd.concat([journal_df_full, payment_df], ignore_index=True), amortization_df=schedule_df
+                ))
+                render_currency_translation(schedule_df, pd.concat([journal_df_full, payment_df], ignore_index=True), contract_currency)
+                if show_licensor_side:
+                    render_licensor_side(schedule_df, cost_input, payment_df=payment_df)
+                render_rollforward(
+                    pd.concat([journal_df_full, payment_df], ignore_index=True), "Fixed_Fee_Rollforward", 'download-fixed-rollforward'
+                )
+                render_cash_forecast(pd.concat([journal_df_full, payment_df], ignore_index=True))
+                render_run_diff("fixed", schedule_df, pd.concat([journal_df_full, payment_df], ignore_index=True))
                 
                 # --- Download Full Report ---
-                excel_data, file_name = create_excel_report(summary_df, schedule_df, journal_df_full, payment_df, periods)
-
                 st.download_button(
                     "Download Full Report (Excel - Schedule, Accrual & Payment JEs)",
-                    excel_data,
-                    file_name,
+                    lambda: create_excel_report(summary_df, schedule_df, journal_df_full, payment_df, periods)[0],
+                    excel_report_file_name(periods),
                     "application/vnd.ms-excel",
-                    key='download-excel'
+                    key='download-excel',
+                    on_click="ignore"
                 )
 
     # ======================================================================
@@ -805,19 +529,23 @@ def content_license_module():
 
         streams_text = st.text_area(
             "Monthly Streams (comma or newline separated)",
-            value="1000000, 1200000, 950000, 1100000",
+            value=", ".join(map(str, DEFAULT_STREAMS)),
             help="Example: 1000000, 1200000, 950000"
         )
 
+        variable_rate_card = rate_card_inputs("variable")
+
         if st.button("Calculate Usage Expense", key="calculate_variable_button"):
             streams = parse_streams_input(streams_text)
-            schedule_df, error_msg = create_variable_royalty_schedule(
-                streams, royalty_rate, usage_start_date.strftime('%Y-%m-%d')
-            )
+            result, error_msg = get_result('variable-royalty', {
+                'streams': streams, 'rate': royalty_rate, 'start_date': usage_start_date.strftime('%Y-%m-%d'),
+                **variable_rate_card
+            }, slot="variable")
 
             if error_msg:
                 st.error(error_msg)
             else:
+                schedule_df = result['schedule']
                 st.success(f"Calculation Complete: {len(schedule_df)} periods found.")
 
                 st.markdown("### Usage Expense Schedule")
@@ -828,27 +556,32 @@ def content_license_module():
                 st.dataframe(schedule_display_df)
 
                 st.subheader("Journal Entry Mappings (Accrual)")
-                journal_df = generate_variable_royalty_journals(schedule_df, LICENSE_NAME)
+                journal_df = result['journals']
                 journal_display_df = journal_df.copy()
                 journal_display_df['Debit'] = journal_display_df['Debit'].map('{:,.2f}'.format)
                 journal_display_df['Credit'] = journal_display_df['Credit'].map('{:,.2f}'.format)
                 st.dataframe(journal_display_df)
 
+                render_validation(validate_batch(journal_df))
+                render_currency_translation(schedule_df, journal_df, contract_currency)
+                if show_licensor_side:
+                    render_licensor_side(schedule_df)
+                render_cash_forecast(journal_df)
+                render_run_diff("variable", schedule_df, journal_df)
+
                 summary_df = pd.DataFrame([
                     ("Royalty Rate ($/stream)", f"${royalty_rate:,.4f}"),
                     ("Total Streams", f"{schedule_df['Streams'].sum():,}"),
                     ("Total Royalty Expense", f"${schedule_df['Royalty_Expense'].sum():,.2f}")
                 ], columns=["Metric", "Value"])
 
-                excel_data, file_name = create_basic_excel_report(
-                    summary_df, schedule_df, journal_df, "Variable_Royalty"
-                )
                 st.download_button(
                     "Download Report (Excel - Schedule & JEs)",
-                    excel_data,
-                    file_name,
+                    lambda: create_basic_excel_report(summary_df, schedule_df, journal_df, "Variable_Royalty")[0],
+                    basic_report_file_name("Variable_Royalty"),
                     "application/vnd.ms-excel",
-                    key='download-variable-excel'
+                    key='download-variable-excel',
+                    on_click="ignore"
                 )
 
     # ======================================================================
@@ -888,19 +621,23 @@ def content_license_module():
 
         mg_streams_text = st.text_area(
             "Monthly Streams (comma or newline separated)",
-            value="1000000, 1200000, 950000, 1100000",
+            value=", ".join(map(str, DEFAULT_STREAMS)),
             help="Example: 1000000, 1200000, 950000"
         )
 
+        mg_rate_card = rate_card_inputs("mg")
+
         if st.button("Calculate MG Usage", key="calculate_mg_button"):
             streams = parse_streams_input(mg_streams_text)
-            schedule_df, error_msg = create_mg_hybrid_schedule(
-                streams, mg_rate, mg_amount, mg_start_date.strftime('%Y-%m-%d')
-            )
+            result, error_msg = get_result('mg-hybrid', {
+                'streams': streams, 'rate': mg_rate, 'mg_amount': mg_amount,
+                'start_date': mg_start_date.strftime('%Y-%m-%d'), **mg_rate_card
+            }, slot="mg")
 
             if error_msg:
                 st.error(error_msg)
             else:
+                schedule_df = result['schedule']
                 st.success(f"Calculation Complete: {len(schedule_df)} periods found.")
 
                 total_usage = schedule_df['Usage_Expense'].sum()
@@ -923,25 +660,103 @@ def content_license_module():
                 st.dataframe(schedule_display_df)
 
                 st.subheader("Journal Entry Mappings")
-                journal_df = generate_mg_hybrid_journals(
-                    schedule_df, LICENSE_NAME, mg_amount, mg_start_date.strftime('%Y-%m-%d')
-                )
+                journal_df = result['journals']
                 journal_display_df = journal_df.copy()
                 journal_display_df['Debit'] = journal_display_df['Debit'].map('{:,.2f}'.format)
                 journal_display_df['Credit'] = journal_display_df['Credit'].map('{:,.2f}'.format)
                 st.dataframe(journal_display_df)
 
-                excel_data, file_name = create_basic_excel_report(
-                    summary_df, schedule_df, journal_df, "MG_Hybrid"
-                )
+                render_validation(validate_batch(journal_df, mg_schedule_df=schedule_df, mg_amount=mg_amount))
+                render_currency_translation(schedule_df, journal_df, contract_currency)
+                if show_licensor_side:
+                    render_licensor_side(schedule_df, mg_amount, mg_start_date.strftime('%Y-%m-%d'))
+                render_rollforward(journal_df, "MG_Rollforward", 'download-mg-rollforward')
+                render_cash_forecast(journal_df)
+                render_run_diff("mg", schedule_df, journal_df)
+
                 st.download_button(
                     "Download Report (Excel - Schedule & JEs)",
-                    excel_data,
-                    file_name,
+                    lambda: create_basic_excel_report(summary_df, schedule_df, journal_df, "MG_Hybrid")[0],
+                    basic_report_file_name("MG_Hybrid"),
                     "application/vnd.ms-excel",
-                    key='download-mg-excel'
+                    key='download-mg-excel',
+                    on_click="ignore"
                 )
 
+    # ======================================================================
+    # PORTFOLIO IMPORT PATHWAY
+    # ======================================================================
+    elif method_selection == "Portfolio Import (Excel/CSV)":
+
+        st.subheader("3.4 Portfolio Import (Excel/CSV)")
+        st.info("📂 **Bulk Load:** One row per contract. `Model` routes each row to the Fixed, Variable or MG engine; `Streams` lists monthly volumes separated by `;`; optional `Tiers` (`floor:rate` pairs) price a usage row with a rate card. See `data/contract_portfolio_template.csv` for the layout.")
+
+        uploaded_file = st.file_uploader("Contract File", type=["csv", "xlsx"], key="portfolio_upload")
+        if uploaded_file is not None:
+            contracts_df, errors_df, summary_df = load_contract_portfolio(uploaded_file.getvalue(), uploaded_file.name)
+
+            if not errors_df.empty:
+                st.error(f"{len(errors_df)} validation issue(s) found. Invalid rows are excluded from the portfolio.")
+                st.dataframe(errors_df)
+
+            if not contracts_df.empty:
+                st.success(f"Loaded {len(contracts_df):,} contracts.")
+
+                st.markdown("### Portfolio Summary")
+                # Amounts stay in contract currency, so totals never add USD to EUR.
+                model_totals = summary_df.groupby(['Model', 'Currency'], as_index=False).agg(
+                    Contracts=('Contract_ID', 'size'),
+                    Total_Expense=('Total_Expense', 'sum'),
+                    Overage_Expense=('Overage_Expense', 'sum'),
+                    Ending_Prepaid=('Ending_Prepaid', 'sum'),
+                )
+                st.dataframe(model_totals)
+                st.dataframe(summary_df)
+
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    forecast_frequency = st.selectbox(
+                        "Forecast Buckets", options=list(FREQUENCIES), format_func=FREQUENCIES.get, key="portfolio_forecast_frequency"
+                    )
+                with col2:
+                    forecast_start = st.date_input(
+                        "Forecast From", value=contracts_df['Start_Date'].min().date(), key="portfolio_forecast_start"
+                    )
+                with col3:
+                    forecast_horizon = st.number_input(
+                        "Horizon (Months)", min_value=1, max_value=120, value=12, step=1, key="portfolio_forecast_horizon"
+                    )
+                journal_df, error_msg = load_portfolio_journals(contracts_df)
+                if error_msg:
+                    st.error(error_msg)
+                else:
+                    render_cash_forecast(journal_df, forecast_frequency, forecast_start, int(forecast_horizon))
+                    render_rollforward(
+                        journal_df, "Portfolio_Rollforward", 'download-portfolio-rollforward',
+                        currencies=contracts_df.set_index('Contract_ID')['Currency']
+                    )
+
+                st.markdown("### Contract Drill-Down")
+                selected_id = st.selectbox("Contract", options=contracts_df['Contract_ID'], key="portfolio_contract_select")
+                selected = contracts_df.loc[contracts_df['Contract_ID'] == selected_id].iloc[0]
+                result, error_msg = get_result(*contract_request(selected), slot="portfolio")
+
+                if error_msg:
+                    st.error(error_msg)
+                else:
+                    st.dataframe(result['schedule'])
+                    st.dataframe(result['journals'])
+                    render_currency_translation(result['schedule'], result['journals'], selected['Currency'])
+
+                    st.download_button(
+                        "Download Report (Excel - Portfolio Summary & Selected Contract)",
+                        lambda: create_basic_excel_report(summary_df, result['schedule'], result['journals'], f"Portfolio_{selected_id}")[0],
+                        basic_report_file_name(f"Portfolio_{selected_id}"),
+                        "application/vnd.ms-excel",
+                        key='download-portfolio-excel',
+                        on_click="ignore"
+                    )
+
 
 # ==============================================================================
 # D. OPEX VS CAPEX MODULE
@@ -989,6 +804,187 @@ def opex_vs_capex_module():
 
     st.info("Tip: If a cost simply keeps the asset running at its current level, it is usually Opex. If it makes the asset better, bigger, or longer-lived, it is usually Capex.")
 
+    st.markdown("---")
+    st.subheader("5. Depreciation Calculator")
+    st.markdown("Once capitalized, the cost less salvage is depreciated from the in-service month. The journals follow the licensing layout: **PP&E (15001)** against **Accounts Payable (22611)** at capitalization, then **Depreciation Expense (60041)** against **Accumulated Depreciation (15901)** each month.")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        asset_cost = st.number_input("Asset Cost ($)", min_value=1.0, value=250_000.00, step=1000.0, format="%.2f", key="asset_cost_input")
+        salvage_value = st.number_input("Salvage Value ($)", min_value=0.0, value=25_000.00, step=1000.0, format="%.2f", key="asset_salvage_input")
+    with col2:
+        in_service_date = st.date_input("In-Service Date", value=DEFAULT_START_DATE, key="asset_in_service_key")
+        useful_life = st.number_input("Useful Life (Months)", min_value=1, value=60, step=1, key="asset_life_input")
+    with col3:
+        depreciation_method = st.selectbox("Depreciation Method", options=DEPRECIATION_METHODS, key="depreciation_method_select")
+        db_factor = st.number_input("Declining-Balance Factor", min_value=0.5, value=DEFAULT_DB_FACTOR, step=0.5, key="asset_db_factor_input")
+    units_text = st.text_area(
+        "Units Produced per Month (units-of-production only, comma or newline separated)",
+        value="1000, 1200, 950, 1100",
+        key="asset_units_text"
+    )
+
+    if st.button("Calculate Depreciation", key="calculate_depreciation_button"):
+        schedule_df, error_msg = create_depreciation_schedule(
+            asset_cost, salvage_value, in_service_date.strftime('%Y-%m-%d'), int(useful_life),
+            depreciation_method, db_factor, parse_streams_input(units_text)
+        )
+        if error_msg:
+            st.error(error_msg)
+        else:
+            st.success(f"Calculation Complete: {len(schedule_df)} periods found.")
+            st.dataframe(schedule_df)
+            journal_df = generate_depreciation_journals(schedule_df, "Capital Asset", asset_cost)
+            journal_display_df = journal_df.copy()
+            journal_display_df['Debit'] = journal_display_df['Debit'].map('{:,.2f}'.format)
+            journal_display_df['Credit'] = journal_display_df['Credit'].map('{:,.2f}'.format)
+            st.dataframe(journal_display_df)
+            render_validation(validate_batch(journal_df))
+
+            summary_df = pd.DataFrame([
+                ("Asset Cost", f"${asset_cost:,.2f}"),
+                ("Salvage Value", f"${salvage_value:,.2f}"),
+                ("Method", depreciation_method),
+                ("Periods", f"{len(schedule_df)}"),
+            ], columns=["Metric", "Value"])
+            st.download_button(
+                "Download Report (Excel - Schedule & JEs)",
+                lambda: create_basic_excel_report(summary_df, schedule_df, journal_df, "Depreciation")[0],
+                basic_report_file_name("Depreciation"),
+                "application/vnd.ms-excel",
+                key='download-depreciation-excel',
+                on_click="ignore"
+            )
+
+    st.subheader("6. Fixed-Asset Register (Bulk)")
+    st.info("📂 **Bulk Load:** One row per asset with `Asset_ID`, `Cost`, `In_Service_Date`, `Useful_Life_Months` and `Method` (SL, DDB, SYD or UOP). Units-of-production assets list monthly `Units` separated by `;`. See `data/asset_register_template.csv` for the layout.")
+    register_file = st.file_uploader("Asset Register", type=["csv", "xlsx"], key="asset_register_upload")
+    if register_file is not None:
+        register_df, errors_df, schedule_df, summary_df = load_asset_register(register_file.getvalue(), register_file.name)
+        if not errors_df.empty:
+            st.error(f"{len(errors_df)} validation issue(s) found. Invalid rows are excluded from the register.")
+            st.dataframe(errors_df)
+        if not register_df.empty:
+            render_asset_register(register_df, schedule_df, summary_df, "register")
+
+    st.subheader("7. Capitalization Policy (Bulk Spend)")
+    st.markdown("Classifies each spend line against the policy: **Capex** when it meets the threshold, benefits more than the minimum period and is not a routine category (maintenance, repair, training, research, support). Needs `Amount` and `Benefit_Months` columns; `Spend_ID`, `Description`, `Category` and `Date` are optional. See `data/spend_template.csv`.")
+    col1, col2 = st.columns(2)
+    with col1:
+        threshold = st.number_input("Capitalization Threshold ($)", min_value=0.0, value=CAPITALIZATION_THRESHOLD, step=500.0, key="capex_threshold_input")
+    with col2:
+        min_benefit = st.number_input("Minimum Benefit Period (Months)", min_value=0, value=MIN_BENEFIT_MONTHS, step=1, key="capex_benefit_input")
+    spend_file = st.file_uploader("Spend File", type=["csv", "xlsx"], key="spend_upload")
+    if spend_file is not None:
+        spend_df, error_msg = read_contract_file(spend_file.getvalue(), spend_file.name)
+        if not error_msg:
+            classified_df, error_msg = classify_spend(spend_df, threshold, min_benefit)
+        if error_msg:
+            st.error(error_msg)
+        else:
+            st.dataframe(classified_df.groupby(['Treatment', 'Reason'], as_index=False).agg(
+                Lines=('Amount', 'size'), Amount=('Amount', 'sum')
+            ))
+            st.dataframe(classified_df)
+            capex_method = st.selectbox("Depreciate Capex lines with", options=DEPRECIATION_METHODS[:3], key="capex_method_select")
+            register_df, errors_df = validate_asset_register(
+                spend_to_register(classified_df, capex_method, in_service_date=DEFAULT_START_DATE)
+            )
+            if not errors_df.empty:
+                st.dataframe(errors_df)
+            if not register_df.empty:
+                schedule_df, _, _ = depreciate_register(register_df, journals=False)
+                render_asset_register(register_df, schedule_df, register_summary(register_df, schedule_df), "spend")
+
+
+# ==============================================================================
+# E. EXPENSE CONCEPTS MODULE
+# ==============================================================================
+
+# Models with their own pathway in Modules 1 and 2 are not repeated here.
+EXPENSE_CONCEPT_MODELS = [
+    name for name in SCHEDULE_MODELS
+    if name not in ('amortization', 'variable-royalty', 'mg-hybrid', 'tiered-royalty', 'tiered-mg', 'depreciation')
+]
+
+
+def schedule_model_inputs(model):
+    """Renders the form for a registered schedule model from its input spec; returns runner params."""
+    params = {}
+    columns = st.columns(2)
+    for position, (term, label, kind, default) in enumerate(SCHEDULE_MODELS[model]['inputs']):
+        key = f"{model}_{term}_input"
+        with columns[position % 2]:
+            if kind == 'money':
+                params[term] = st.number_input(label, min_value=0.0, value=float(default), step=1000.0, format="%.2f", key=key)
+            elif kind == 'rate':
+                params[term] = st.number_input(label, min_value=0.0001, value=float(default), step=0.0001, format="%.4f", key=key)
+            elif kind == 'percent':
+                params[term] = st.number_input(label, min_value=0.0, value=default * 100, step=0.5, key=key) / 100
+            elif kind == 'months':
+                params[term] = int(st.number_input(label, min_value=1, value=int(default), step=1, key=key))
+            elif kind == 'date':
+                params[term] = st.date_input(label, value=pd.to_datetime(default).date(), key=key).strftime('%Y-%m-%d')
+            elif kind == 'streams':
+                params[term] = parse_streams_input(st.text_area(label, value=", ".join(map(str, default)), key=key))
+            elif kind == 'tiers':
+                tiers_text = ", ".join(f"{floor}:{rate}" for floor, rate in default)
+                params[term] = parse_tiers_input(st.text_area(label, value=tiers_text, key=key))
+            elif kind == 'choice':
+                options = list(SCHEDULE_MODELS[model]['choices'][term])
+                params[term] = st.selectbox(label, options=options, index=options.index(default), key=key)
+    return params
+
+
+def expense_concepts_module():
+    """Defines the generic expense-concept module (prepaids, accruals and deferrals)."""
+    st.title("🧾 Module 3: Expense Concepts")
+    st.header("Prepaids, Accruals and Deferrals")
+    st.markdown("Each concept below runs on the same schedule engine as the licensing models: pick a concept, enter its terms, and get the period schedule and double-entry journals.")
+    st.markdown("---")
+
+    model = st.selectbox(
+        "Expense Concept",
+        options=EXPENSE_CONCEPT_MODELS,
+        format_func=lambda name: SCHEDULE_MODELS[name]['label'],
+        key="expense_concept_select"
+    )
+    st.info(SCHEDULE_MODELS[model]['description'])
+    params = schedule_model_inputs(model)
+
+    if st.button("Generate Schedule", key="expense_concept_button"):
+        result, error_msg = get_result(model, params, slot="expense-concept")
+        if error_msg:
+            st.error(error_msg)
+            return
+
+        schedule_df, journal_df = result['schedule'], result['journals']
+        st.success(f"Calculation Complete: {len(schedule_df)} periods found.")
+
+        st.markdown("### Schedule")
+        st.dataframe(schedule_df)
+
+        st.subheader("Journal Entry Mappings")
+        journal_display_df = journal_df.copy()
+        journal_display_df['Debit'] = journal_display_df['Debit'].map('{:,.2f}'.format)
+        journal_display_df['Credit'] = journal_display_df['Credit'].map('{:,.2f}'.format)
+        st.dataframe(journal_display_df)
+
+        render_validation(validate_batch(journal_df))
+
+        summary_df = pd.DataFrame(
+            [(label, params[term]) for term, label, _, _ in SCHEDULE_MODELS[model]['inputs']], columns=["Metric", "Value"]
+        ).astype({'Value': str})
+        report_name = SCHEDULE_MODELS[model]['label'].replace(" ", "_")
+        st.download_button(
+            "Download Report (Excel - Schedule & JEs)",
+            lambda: create_basic_excel_report(summary_df, schedule_df, journal_df, report_name)[0],
+            basic_report_file_name(report_name),
+            "application/vnd.ms-excel",
+            key='download-expense-concept-excel',
+            on_click="ignore"
+        )
+
 
 # ==============================================================================
 # C. STREAMLIT APPLICATION ROUTING
@@ -999,6 +995,7 @@ PAGES = {
     "Home: Guide Overview": home_page,
     "Module 1: Content Licensing": content_license_module,
     "Module 2: Opex vs Capex": opex_vs_capex_module,
+    "Module 3: Expense Concepts": expense_concepts_module,
 }
 
 # Streamlit App Execution
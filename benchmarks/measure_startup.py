@@ -0,0 +1,67 @@
+"""Measures Streamlit time-to-first-render and per-rerun cost for appV2.py.
+
+Runs the app headless through ``streamlit.testing.v1.AppTest``. It reports the cold import of the
+app's dependencies (fresh interpreter), the first render, the first visit to each page, and the
+mean/p95 of repeated reruns per page.
+
+Usage: python benchmarks/measure_startup.py [--reruns 20]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "appV2.py")
+COLD_IMPORT = (
+    "import time; t = time.perf_counter(); "
+    "import streamlit, pandas, engine.calculations, engine.runner; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def cold_import_seconds():
+    """Import cost of the app's dependencies in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", COLD_IMPORT], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return float(output.stdout.strip())
+
+
+def timed_run(app):
+    start = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"App raised during run: {app.exception[0].value}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=20, help="Reruns measured per page.")
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    print(f"Cold dependency import:  {cold_import_seconds() * 1000:8.1f} ms")
+
+    os.chdir(ROOT)
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+    print(f"Time to first render:    {timed_run(app) * 1000:8.1f} ms")
+
+    navigation = app.radio(key="navigation_radio")
+    print(f"\n{'Page':<32}{'first visit':>14}{'rerun mean':>14}{'rerun p95':>14}")
+    for page in navigation.options:
+        navigation.set_value(page)
+        first_visit = timed_run(app)
+        reruns = sorted(timed_run(app) for _ in range(args.reruns))
+        p95 = reruns[min(len(reruns) - 1, int(len(reruns) * 0.95))]
+        print(f"{page:<32}{first_visit * 1000:11.1f} ms{statistics.mean(reruns) * 1000:11.1f} ms{p95 * 1000:11.1f} ms")
+        navigation = app.radio(key="navigation_radio")
+
+
+if __name__ == "__main__":
+    main()
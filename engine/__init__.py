@@ -0,0 +1 @@
+"""Calculation engine behind the Interactive Technical Accounting Guide."""
@@ -0,0 +1,238 @@
+"""Local HTTP service exposing the Python engine to the Next.js front end.
+
+Run with ``uvicorn engine.api:app --port 8502``. Every model answers with its frames as JSON
+(gzip-compressed by the middleware) or, when the client sends ``Accept: application/vnd.apache.arrow.stream``,
+a single frame (``?frame=schedule|journals|payments``) as an Arrow IPC stream. Responses are
+cached in memory keyed on a hash of the request, so repeated scenarios are served without
+recomputing. Malformed requests get a 400 with an ``error`` message; a batch reports errors per
+item. Numeric inputs must be finite and non-negative, and terms are capped at ``MAX_TERM_MONTHS``
+so one request cannot build an unbounded schedule. ``app/lib/engineClient.js`` is the matching
+drop-in for ``app/lib/calculations.js``, used by the content page when ``NEXT_PUBLIC_ENGINE_URL``
+is set.
+"""
+import hashlib
+import json
+import math
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from engine.runner import MODELS, run_model
+from engine.schedule_models import parse_dates, term_months
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+CACHE_SIZE = 256
+ALLOWED_ORIGINS = ["http://localhost:3000", "http://127.0.0.1:3000"]
+MAX_TERM_MONTHS = 1200  # 100 years of monthly periods.
+TERM_PARAMS = ('term_months', 'useful_life_months')
+SERIES_PARAMS = ('streams', 'units')
+TEXT_PARAMS = ('license_name',)
+
+
+# ==============================================================================
+# INPUT CHECKS
+# ==============================================================================
+
+def _numbers(value):
+    """Every number in a parameter, with lists (streams, tier pairs) flattened and numeric strings parsed."""
+    if isinstance(value, (list, tuple)):
+        return [number for item in value for number in _numbers(item)]
+    if isinstance(value, (int, float, str)):
+        try:
+            return [float(value)]
+        except ValueError:
+            return []  # Dates and option names.
+        except OverflowError:
+            return [math.inf]
+    return []
+
+
+def check_params(params):
+    """Error message for parameters the engine cannot run safely, or None."""
+    for name, value in params.items():
+        if name in TEXT_PARAMS:
+            continue
+        numbers = _numbers(value)
+        if not all(math.isfinite(number) for number in numbers):
+            return f"'{name}' must be a finite number."
+        if any(number < 0 for number in numbers):
+            return f"'{name}' must not be negative."
+        if name in TERM_PARAMS and numbers and max(numbers) > MAX_TERM_MONTHS:
+            return f"'{name}' must be at most {MAX_TERM_MONTHS} months."
+        if name in SERIES_PARAMS and isinstance(value, list) and len(value) > MAX_TERM_MONTHS:
+            return f"'{name}' must cover at most {MAX_TERM_MONTHS} months."
+
+    if isinstance(params.get('start_date'), str) and isinstance(params.get('end_date'), str):
+        start_dates, end_dates = parse_dates([params['start_date']]), parse_dates([params['end_date']])
+        if not np.isnat(start_dates[0]) and not np.isnat(end_dates[0]) and term_months(start_dates, end_dates)[0] > MAX_TERM_MONTHS:
+            return f"The term from start_date to end_date must be at most {MAX_TERM_MONTHS} months."
+    return None
+
+
+# ==============================================================================
+# SERIALIZATION AND CACHE
+# ==============================================================================
+
+def result_to_json(result):
+    """Serializes frames with pandas' writer directly, avoiding a per-row dict round trip.
+
+    Raises ValueError when meta holds NaN or infinity, which is not valid JSON.
+    """
+    parts = [f'"meta":{json.dumps(result["meta"], allow_nan=False)}']
+    for name, frame in result.items():
+        if name != 'meta':
+            parts.append(f'"{name}":{frame.to_json(orient="records")}')
+    return ('{' + ','.join(parts) + '}').encode('utf-8')
+
+
+def frame_to_arrow(frame):
+    """Encodes one frame as an Arrow IPC stream (needs pyarrow)."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class ResponseCache:
+    """Thread-safe LRU of encoded response bodies keyed by request hash."""
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+CACHE = ResponseCache()
+
+
+def error_response(message, status=400):
+    """(status, body bytes, media type) for a JSON error message."""
+    return status, json.dumps({'error': message}).encode('utf-8'), 'application/json'
+
+
+def encode_response(model, params, frame=None):
+    """Returns (status, body bytes, media type) for a request, using the cache when possible."""
+    if not isinstance(params, dict):
+        return error_response("Parameters must be a JSON object.")
+    error_msg = check_params(params)
+    if error_msg:
+        return error_response(error_msg)
+    cache_key = ResponseCache.key(model, params, frame)
+    cached = CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    result, error_msg = run_model(model, params)
+    if error_msg:
+        return error_response(error_msg)
+
+    if frame is None:
+        try:
+            encoded = (200, result_to_json(result), 'application/json')
+        except ValueError:
+            return error_response("The result is not finite; check the numeric inputs.")
+    elif frame not in result or frame == 'meta':
+        return error_response(f"Unknown frame '{frame}'.")
+    else:
+        try:
+            encoded = (200, frame_to_arrow(result[frame]), ARROW_MEDIA_TYPE)
+        except ImportError:
+            return error_response("Arrow responses need pyarrow; request JSON instead.", status=406)
+
+    CACHE.put(cache_key, encoded)
+    return encoded
+
+
+# ==============================================================================
+# ROUTES
+# ==============================================================================
+
+async def _read_json(request):
+    """Returns (parsed body, error response); the error is a 400 when the body is not valid JSON."""
+    try:
+        return await request.json(), None
+    except ValueError:
+        status, body, media_type = error_response("Request body must be valid JSON.")
+        return None, Response(body, status_code=status, media_type=media_type)
+
+
+def _batch_item(item):
+    """Encoded body for one batch item; a malformed item gets its own error instead of failing the batch."""
+    if not isinstance(item, dict):
+        return error_response("Each batch request must be an object with 'model' and 'params'.")[1]
+    return encode_response(item.get('model'), item.get('params', {}))[1]
+
+
+async def run_endpoint(request):
+    model = request.path_params['model']
+    params, error = await _read_json(request)
+    if error:
+        return error
+    frame = None
+    if ARROW_MEDIA_TYPE in request.headers.get('accept', ''):
+        frame = request.query_params.get('frame', 'schedule')
+    status, body, media_type = await run_in_threadpool(encode_response, model, params, frame)
+    return Response(body, status_code=status, media_type=media_type)
+
+
+async def batch_endpoint(request):
+    """Runs many scenarios in one round trip: ``{"requests": [{"model": ..., "params": {...}}, ...]}``."""
+    payload, error = await _read_json(request)
+    if error:
+        return error
+    if not isinstance(payload, dict) or not isinstance(payload.get('requests', []), list):
+        status, body, media_type = error_response('Expected {"requests": [{"model": ..., "params": {...}}, ...]}.')
+        return Response(body, status_code=status, media_type=media_type)
+
+    def run_batch():
+        bodies = [_batch_item(item).decode('utf-8') for item in payload.get('requests', [])]
+        return ('[' + ','.join(bodies) + ']').encode('utf-8')
+
+    return Response(await run_in_threadpool(run_batch), media_type='application/json')
+
+
+async def health_endpoint(request):
+    return JSONResponse({'status': 'ok', 'models': list(MODELS)})
+
+
+app = Starlette(
+    routes=[
+        Route('/health', health_endpoint, methods=['GET']),
+        Route('/api/batch', batch_endpoint, methods=['POST']),
+        Route('/api/{model}', run_endpoint, methods=['POST']),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=ALLOWED_ORIGINS, allow_methods=['GET', 'POST'], allow_headers=['*']),
+        Middleware(GZipMiddleware, minimum_size=1024),
+    ],
+)
@@ -0,0 +1,215 @@
+"""Core schedule and journal calculations shared by the Streamlit app and batch tools.
+
+Mirrors ``app/lib/calculations.js``; nothing in this module touches Streamlit.
+"""
+import io
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from engine.journals import journal_legs, JOURNAL_COLUMNS, AP_VENDOR, CASH
+from engine.schedule_models import (
+    build_schedule, build_journals, parse_dates, term_months, expand_periods, month_end_axis,
+)
+
+# --- CONFIGURATION (You can adjust these defaults) ---
+DEFAULT_COST = 200_000_000.00
+DEFAULT_START_DATE = datetime.date(2020, 12, 1)
+DEFAULT_END_DATE = datetime.date(2023, 12, 31)
+LICENSE_NAME = "Content Licensing Agreement"
+MG_DEFAULT = 500_000.00
+RATE_DEFAULT = 0.005 # $0.005 per stream
+
+# ==============================================================================
+# A. CORE AMORTIZATION CALCULATION FUNCTIONS (Fixed Fee Model)
+# ==============================================================================
+
+def create_amortization_schedule(cost, start_date_str, end_date_str):
+    """Calculates the Straight-Line Amortization Schedule and NBV."""
+    schedule_df, meta, error_msg = build_schedule(
+        'amortization', {'cost': cost, 'start_date': start_date_str, 'end_date': end_date_str}
+    )
+    if error_msg:
+        return 0, 0, pd.DataFrame(), error_msg
+    return meta['monthly_expense'], int(meta['total_months']), schedule_df, None
+
+# Helper function for the Amortization tool output
+def create_amortization_summary_df(cost, term, rate):
+    """Creates the summary table for display, using comma formatting."""
+    summary_data = [
+        ("Total License Fee", f"${cost:,.2f}"),
+        ("Total Term (Months)", term),
+        ("Monthly Expense Recognition", f"${rate:,.2f}"),
+        ("Annual Expense Recognition", f"${rate*12:,.2f}")
+    ]
+    return pd.DataFrame(summary_data, columns=['Metric', 'Value'])
+
+# --- Journal Entry Generation (Shared Logic) ---
+def generate_amortization_journals(schedule_df, license_name, total_cost):
+    """Generates the initial prepaid JE and monthly expense JEs based on the input schedule_df size."""
+    return build_journals('amortization', schedule_df, {'cost': total_cost}, license_name)
+
+# --- NEW FUNCTION: Quarterly Payment Journal Generation ---
+def generate_quarterly_payment_journals(total_cost, start_date_str):
+    """Generates the quarterly JE for cash payment against the initial liability."""
+    payment_df = generate_portfolio_payment_journals(pd.DataFrame({
+        'contract_id': [0], 'cost': [total_cost], 'start_date': [start_date_str],
+        'end_date': [DEFAULT_END_DATE.strftime('%Y-%m-%d')], 'license_name': [LICENSE_NAME],
+    }))
+    return payment_df.drop(columns='Contract_ID')
+
+
+def generate_portfolio_payment_journals(terms):
+    """Quarterly payment JEs for many fixed-fee contracts (contract_id, cost, start_date, end_date, license_name).
+
+    Each fee is paid in equal quarters over the contract's own term; a contract with no quarter
+    left gets no lines, and an empty result still carries the journal columns.
+    """
+    start_dates = parse_dates(terms['start_date'])
+    end_dates = parse_dates(terms['end_date'])
+    num_quarters = np.maximum((term_months(start_dates, end_dates) + 2) // 3, 0)
+    if not num_quarters.any():
+        return pd.DataFrame(columns=['Contract_ID'] + JOURNAL_COLUMNS)
+    contract_idx, quarter_idx = expand_periods(num_quarters)
+    costs = terms['cost'].to_numpy(dtype=float)
+    quarterly_payment_amount = costs / np.maximum(num_quarters, 1)
+
+    # Quarter-end accrual dates; payment is Net 30 days after each.
+    quarter_ends = month_end_axis(start_dates, contract_idx, 3 * (quarter_idx + 1))
+    payment_dates = np.datetime_as_string(quarter_ends.astype('datetime64[D]') + 30, unit='D')
+
+    payments = quarterly_payment_amount[contract_idx]
+    # Final adjustment to ensure full liability is cleared
+    final = quarter_idx == num_quarters[contract_idx] - 1
+    payments[final] = (costs - quarterly_payment_amount * (num_quarters - 1))[contract_idx[final]]
+
+    licenses = terms['license_name'].to_numpy(dtype=object)[contract_idx]
+    payment_df, _ = journal_legs(payment_dates, payments, 'PAYMENT', licenses, AP_VENDOR, CASH)
+    payment_df.insert(0, 'Contract_ID', np.repeat(terms['contract_id'].to_numpy()[contract_idx], 2))
+    return payment_df
+
+
+def parse_streams_input(streams_text):
+    """Parses a comma or newline separated list of stream counts."""
+    if not streams_text.strip():
+        return []
+    cleaned = streams_text.replace("\n", ",")
+    values = [v.strip() for v in cleaned.split(",") if v.strip()]
+    streams = []
+    for value in values:
+        if not value.replace("_", "").isdigit():
+            return []
+        streams.append(int(value.replace("_", "")))
+    return streams
+
+
+def create_variable_royalty_schedule(streams, rate, start_date_str):
+    """Creates a monthly schedule for variable royalty usage."""
+    schedule_df, _, error_msg = build_schedule(
+        'variable-royalty', {'streams': streams, 'rate': rate, 'start_date': start_date_str}
+    )
+    return schedule_df, error_msg
+
+
+def generate_variable_royalty_journals(schedule_df, license_name):
+    """Generates monthly accrual entries for variable royalties."""
+    return build_journals('variable-royalty', schedule_df, {}, license_name)
+
+
+def create_mg_hybrid_schedule(streams, rate, mg_amount, start_date_str):
+    """Creates a hybrid MG usage schedule with prepaid drawdown and overage."""
+    schedule_df, _, error_msg = build_schedule(
+        'mg-hybrid', {'streams': streams, 'rate': rate, 'mg_amount': mg_amount, 'start_date': start_date_str}
+    )
+    return schedule_df, error_msg
+
+
+def generate_mg_hybrid_journals(schedule_df, license_name, mg_amount, start_date_str):
+    """Generates MG upfront entry and monthly expense/overage accruals."""
+    return build_journals(
+        'mg-hybrid', schedule_df, {'mg_amount': mg_amount, 'start_date': start_date_str}, license_name
+    )
+
+
+def create_excel_report(summary_df, schedule_df, journal_df, payment_df, periods):
+    """Creates a multi-sheet Excel file in memory with formatted columns."""
+    
+    output = io.BytesIO()
+    
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        
+        def auto_fit_columns(df, sheet_name):
+            number_format = writer.book.add_format({'num_format': '#,##0.00'})
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            worksheet = writer.sheets[sheet_name]
+            
+            for i, col in enumerate(df.columns):
+                max_len = max(df[col].astype(str).str.len().max(), len(col)) + 1
+                width = min(max(max_len, 12), 40)
+                worksheet.set_column(i, i, width)
+                
+                financial_cols = ['Amortization_Expense', 'Accumulated_Amortization', 'Net_Book_Value_NBV', 'Debit', 'Credit']
+                if col in financial_cols:
+                    worksheet.set_column(i, i, width, number_format)
+                elif sheet_name == '1. Deal Summary' and col == 'Value':
+                     if isinstance(df[col].iloc[0], str) and '$' in df[col].iloc[0]:
+                        worksheet.set_column(i, i, width, number_format) 
+
+        auto_fit_columns(summary_df, '1. Deal Summary')
+        auto_fit_columns(schedule_df, '2. Amortization Schedule')
+        auto_fit_columns(journal_df, '3. Monthly Accrual Entries')
+        auto_fit_columns(payment_df, '4. Quarterly Payment Schedule')
+        
+    output.seek(0)
+    
+    return output, excel_report_file_name(periods)
+
+
+def excel_report_file_name(periods):
+    """File name of the fixed-fee amortization report."""
+    return f"Amortization_Report_{periods}M.xlsx"
+
+
+def create_basic_excel_report(summary_df, schedule_df, journal_df, report_name):
+    """Creates a multi-sheet Excel file in memory for non-amortization modules."""
+    output = io.BytesIO()
+
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+
+        def auto_fit_columns(df, sheet_name):
+            number_format = writer.book.add_format({'num_format': '#,##0.00'})
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            worksheet = writer.sheets[sheet_name]
+
+            for i, col in enumerate(df.columns):
+                max_len = max(df[col].astype(str).str.len().max(), len(col)) + 1
+                width = min(max(max_len, 12), 40)
+                worksheet.set_column(i, i, width)
+
+                if col in ['Royalty_Expense', 'Accrued_Payable', 'Usage_Expense', 'Prepaid_Amortization',
+                           'Overage_Expense', 'Ending_Prepaid', 'Accrued_Overage', 'Debit', 'Credit',
+                           'Opening_Prepaid', 'Additions', 'Amortization', 'Closing_Prepaid', 'Opening_Payable',
+                           'Invoiced', 'Overage_Accruals', 'Payments', 'Closing_Payable',
+                           'Amortization_Expense', 'Accumulated_Amortization', 'Net_Book_Value', 'Insurance_Expense',
+                           'Accumulated_Expense', 'Prepaid_Balance', 'Cash_Rent', 'Straight_Line_Expense',
+                           'Deferred_Rent_Change', 'Deferred_Rent_Balance', 'Depreciation_Expense',
+                           'Accumulated_Depreciation', 'Net_Book_Value_NBV']:
+                    worksheet.set_column(i, i, width, number_format)
+
+        if not summary_df.empty:
+            auto_fit_columns(summary_df, '1. Summary')
+        if not schedule_df.empty:
+            auto_fit_columns(schedule_df, '2. Schedule')
+        if not journal_df.empty:
+            auto_fit_columns(journal_df, '3. Journal Entries')
+
+    output.seek(0)
+
+    return output, basic_report_file_name(report_name)
+
+
+def basic_report_file_name(report_name):
+    """File name of a create_basic_excel_report workbook."""
+    safe_name = report_name.replace(" ", "_")
+    return f"{safe_name}_Report.xlsx"
@@ -0,0 +1,168 @@
+"""Accrual-to-cash forecast: payment terms for every accrual type, bucketed into weekly or monthly outflows.
+
+Works on journal lines rather than schedules, so every model that posts to Accounts Payable (22611)
+is covered: fixed-fee vendor invoices, variable royalties, MG overage and capitalized assets. Each
+accrual gets a pay date from its JE type's terms (billing cycle end plus net days) using datetime64
+arithmetic; lines already posted to Cash (10000), such as MG prepayments, scheduled quarterly
+payments and rent, are taken at their own date. Bucketing is a single ``bincount`` over
+(period, source), so the cost is one pass over the lines whatever the portfolio size.
+"""
+import numpy as np
+import pandas as pd
+
+from engine.journals import journal_legs, AP_VENDOR, AP_ROYALTY, CASH
+from engine.validation import CONTRACT_KEY, contract_keys
+
+PAYABLE_ACCOUNT = 22611
+CASH_ACCOUNT = 10000
+
+# JE type -> (billing cycle, net days). Cycles: 'invoice' pays from the accrual date; 'month' and
+# 'quarter' pay from the end of the calendar month/quarter the accrual falls in.
+PAYMENT_TERMS = {
+    'PREPAID': ('invoice', 30),
+    'CAPITALIZE': ('invoice', 30),
+    'ROYALTY': ('quarter', 30),
+    'MG_OVERAGE': ('quarter', 30),
+}
+DEFAULT_TERMS = ('month', 30)  # Any other accrual to 22611.
+CYCLES = ('invoice', 'month', 'quarter')
+# An accrual type is already settled for a contract that carries these explicit payment lines.
+SETTLED_BY = {'PREPAID': 'PAYMENT'}
+FREQUENCIES = {'M': 'Monthly', 'W': 'Weekly'}
+SETTLEMENT_COLUMNS = ['Contract', 'License', 'Source', 'Accrual_Date', 'Pay_Date', 'Amount', 'Derived']
+FORECAST_COLUMNS = ['Period', 'Source', 'Outflow']
+
+
+def _cycle_end(dates, cycles):
+    """End date of each accrual's billing cycle (the date itself for invoice terms)."""
+    months = dates.astype('datetime64[M]')
+    month_index = months.astype(np.int64)
+    quarter_end = (months - month_index % 3 + 3).astype('datetime64[D]') - 1
+    month_end = (months + 1).astype('datetime64[D]') - 1
+    return np.select([cycles == 'quarter', cycles == 'month'], [quarter_end, month_end], default=dates)
+
+
+def settlement_schedule(journal_df, payment_terms=None):
+    """One row per cash outflow: derived settlements of 22611 accruals plus lines already posted to cash.
+
+    ``payment_terms`` overrides entries of ``PAYMENT_TERMS``. Returns (frame, error message); the
+    Derived column marks rows that came from payment terms rather than an existing cash line.
+    """
+    terms = {**PAYMENT_TERMS, **(payment_terms or {})}
+    bad_cycles = sorted({cycle for cycle, _ in terms.values() if cycle not in CYCLES})
+    if bad_cycles:
+        return pd.DataFrame(columns=SETTLEMENT_COLUMNS), f"Unknown billing cycle(s): {', '.join(bad_cycles)}. Use {', '.join(CYCLES)}."
+    if journal_df.empty:
+        return pd.DataFrame(columns=SETTLEMENT_COLUMNS), None
+
+    account = journal_df['Account_Number'].to_numpy()
+    credit = journal_df['Credit'].to_numpy(dtype=float)
+    # JE types, contracts and dates repeat heavily: work on factorized codes and parse or look up
+    # each distinct value once instead of once per line.
+    type_codes, je_types = pd.factorize(journal_df['JE_Type'])
+    contracts = contract_keys(journal_df)
+    contract_codes, _ = pd.factorize(contracts)
+
+    accrual = (account == PAYABLE_ACCOUNT) & (credit > 0)
+    for accrual_type, settled_type in SETTLED_BY.items():
+        if accrual_type not in je_types or settled_type not in je_types:
+            continue
+        settled = np.zeros(contract_codes.max() + 1, dtype=bool)
+        settled[contract_codes[type_codes == je_types.get_loc(settled_type)]] = True
+        accrual &= ~((type_codes == je_types.get_loc(accrual_type)) & settled[contract_codes])
+    paid = (account == CASH_ACCOUNT) & (credit > 0)
+
+    # Only the outflow lines are parsed and shifted; expense and prepaid legs are never converted.
+    rows = np.flatnonzero(accrual | paid)
+    derived = accrual[rows]
+    date_codes, unique_dates = pd.factorize(journal_df['Date'].iloc[rows])
+    dates = pd.to_datetime(unique_dates).to_numpy().astype('datetime64[D]')[date_codes]
+    codes = type_codes[rows]
+    cycles = np.array([terms.get(t, DEFAULT_TERMS)[0] for t in je_types], dtype=object)[codes]
+    net_days = np.array([terms.get(t, DEFAULT_TERMS)[1] for t in je_types], dtype=np.int64)[codes]
+    pay_dates = np.where(derived, _cycle_end(dates, np.where(derived, cycles, 'invoice')) + net_days * derived, dates)
+
+    schedule_df = pd.DataFrame({
+        'Contract': contracts.iloc[rows].to_numpy(), 'License': journal_df['License'].iloc[rows].to_numpy(),
+        'Source': np.asarray(je_types, dtype=object)[codes], 'Accrual_Date': dates, 'Pay_Date': pay_dates,
+        'Amount': credit[rows], 'Derived': derived,
+    }, columns=SETTLEMENT_COLUMNS)
+    if CONTRACT_KEY in journal_df.columns:
+        schedule_df.insert(0, CONTRACT_KEY, journal_df[CONTRACT_KEY].iloc[rows].to_numpy())
+    return schedule_df.iloc[np.argsort(pay_dates, kind='stable')].reset_index(drop=True), None
+
+
+def generate_settlement_journals(settlement_df):
+    """Payment legs (Dr Accounts Payable / Cr Cash) for the derived settlements, JE type ``<source>_PAYMENT``."""
+    derived = settlement_df[settlement_df['Derived']]
+    if derived.empty:
+        return pd.DataFrame()
+    blocks = []
+    for source, rows in derived.groupby('Source', sort=False):
+        payable = AP_VENDOR if source in ('PREPAID', 'CAPITALIZE') else AP_ROYALTY
+        frame, _ = journal_legs(
+            np.datetime_as_string(rows['Pay_Date'].to_numpy().astype('datetime64[D]'), unit='D'),
+            rows['Amount'].to_numpy(), f"{source}_PAYMENT", rows['License'].to_numpy(dtype=object),
+            payable, CASH
+        )
+        if CONTRACT_KEY in rows.columns:
+            frame.insert(0, CONTRACT_KEY, np.repeat(rows[CONTRACT_KEY].to_numpy(), 2))
+        blocks.append(frame.set_index(np.repeat(rows.index.to_numpy(), 2)))
+    return pd.concat(blocks).sort_index(kind='stable').reset_index(drop=True)
+
+
+def _bucket_starts(pay_dates, frequency):
+    """Start date of the week (Monday) or month each pay date falls in."""
+    if frequency == 'W':
+        # 1970-01-01 was a Thursday, so shifting by 3 makes weeks start on Monday.
+        return pay_dates - (pay_dates.astype(np.int64) + 3) % 7
+    return pay_dates.astype('datetime64[M]').astype('datetime64[D]')
+
+
+def forecast_cash(journal_df, as_of=None, horizon_months=12, frequency='M', payment_terms=None):
+    """Projected cash outflows per period and source for the ``horizon_months`` from ``as_of``.
+
+    ``frequency`` is 'M' (calendar months) or 'W' (weeks starting Monday). ``as_of`` defaults to
+    the first month with an outflow. Every period in the horizon is present, with zero where nothing
+    is due. Returns (long frame of Period, Source, Outflow; error message).
+    """
+    if frequency not in FREQUENCIES:
+        return pd.DataFrame(columns=FORECAST_COLUMNS), f"Frequency must be one of: {', '.join(FREQUENCIES)}."
+    settlement_df, error_msg = settlement_schedule(journal_df, payment_terms)
+    if error_msg or settlement_df.empty:
+        return pd.DataFrame(columns=FORECAST_COLUMNS), error_msg
+
+    pay_dates = settlement_df['Pay_Date'].to_numpy().astype('datetime64[D]')
+    start_month = (np.datetime64(pd.Timestamp(as_of).date(), 'M') if as_of is not None else pay_dates.min().astype('datetime64[M]'))
+    window_start = _bucket_starts(np.array([start_month.astype('datetime64[D]')]), frequency)[0]
+    window_end = (start_month + horizon_months).astype('datetime64[D]')
+
+    step = 7 if frequency == 'W' else None
+    if step:
+        period_starts = np.arange(window_start, window_end, step)
+        bucket = (_bucket_starts(pay_dates, 'W') - window_start).astype(np.int64) // step
+    else:
+        period_starts = np.arange(start_month, start_month + horizon_months).astype('datetime64[D]')
+        bucket = (pay_dates.astype('datetime64[M]') - start_month).astype(np.int64)
+    in_window = (pay_dates >= window_start) & (pay_dates < window_end) & (bucket >= 0) & (bucket < len(period_starts))
+
+    source_codes, sources = pd.factorize(settlement_df['Source'], sort=True)
+    cells = bucket[in_window] * len(sources) + source_codes[in_window]
+    totals = np.bincount(cells, weights=settlement_df['Amount'].to_numpy()[in_window],
+                         minlength=len(period_starts) * len(sources))
+    return pd.DataFrame({
+        'Period': np.repeat(np.datetime_as_string(period_starts, unit='D'), len(sources)),
+        'Source': np.tile(np.asarray(sources, dtype=object), len(period_starts)),
+        'Outflow': totals.round(2),
+    }, columns=FORECAST_COLUMNS), None
+
+
+def forecast_summary(forecast_df):
+    """Periods as rows, one column per source plus Total_Outflow and Cumulative_Outflow."""
+    if forecast_df.empty:
+        return pd.DataFrame(columns=['Period', 'Total_Outflow', 'Cumulative_Outflow'])
+    wide = forecast_df.pivot(index='Period', columns='Source', values='Outflow')
+    wide.columns.name = None
+    wide['Total_Outflow'] = wide.sum(axis=1).round(2)
+    wide['Cumulative_Outflow'] = wide['Total_Outflow'].cumsum().round(2)
+    return wide.reset_index()
@@ -0,0 +1,304 @@
+"""Bulk contract portfolio import (xlsx/csv) for the Content Licensing module.
+
+One row per contract. ``Model`` routes the row to the fixed-fee, variable-royalty or MG engine;
+``Streams`` holds the monthly stream counts separated by ``;`` or ``|``. A usage row with
+``Tiers`` (``floor:rate`` pairs, e.g. ``0:0.005, 1000000:0.004``) is priced with that rate card
+instead of ``Rate``, using the optional ``Basis``, ``Method`` and ``Annual_Escalator`` columns. Validation and the
+portfolio summary are column-wise, so they scale with the file rather than with a Python loop
+per contract. Portfolio-wide journals (for the cash forecast) are one vectorized build per engine.
+"""
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from engine.calculations import LICENSE_NAME, generate_portfolio_payment_journals
+from engine.fx import FX_BASE_CURRENCY
+from engine.rate_cards import BASES, METHODS
+from engine.schedule_models import build_schedule, build_journals, term_months
+
+REQUIRED_COLUMNS = ['Contract_ID', 'Model', 'Start_Date']
+OPTIONAL_COLUMNS = ['License', 'Currency', 'Cost', 'End_Date', 'Rate', 'MG_Amount', 'Streams',
+                    'Tiers', 'Basis', 'Method', 'Annual_Escalator']
+MODEL_ALIASES = {
+    'fixed': 'amortization', 'fixed fee': 'amortization', 'amortization': 'amortization',
+    'variable': 'variable-royalty', 'variable royalty': 'variable-royalty', 'variable-royalty': 'variable-royalty',
+    'mg': 'mg-hybrid', 'minimum guarantee': 'mg-hybrid', 'mg-hybrid': 'mg-hybrid',
+}
+# Usage engines priced with a rate card when the row carries Tiers.
+TIERED_ENGINES = {'variable-royalty': 'tiered-royalty', 'mg-hybrid': 'tiered-mg'}
+ENGINES = list(dict.fromkeys([*MODEL_ALIASES.values(), *TIERED_ENGINES.values()]))
+STREAM_SEPARATORS = r'[;|]'
+TIER_SEPARATORS = r'[,\n]'
+ERROR_COLUMNS = ['Row', 'Contract_ID', 'Column', 'Error']
+# What a malformed upload or a missing Excel engine raises from the readers below.
+READ_ERRORS = (ValueError, ImportError, OSError, zipfile.BadZipFile)
+
+
+def read_contract_file(data, file_name):
+    """Reads an uploaded xlsx/csv, preferring the calamine/pyarrow parsers; returns (frame, error message)."""
+    try:
+        return _read_file(data, file_name), None
+    except READ_ERRORS as exc:
+        return pd.DataFrame(), f"Could not read file: {exc}"
+
+
+def file_error(message, columns=ERROR_COLUMNS):
+    """Error table with a single row for a file that could not be read at all."""
+    return pd.DataFrame([(1, '', 'File', message)], columns=columns)
+
+
+def _read_file(data, file_name):
+    buffer = io.BytesIO(data if isinstance(data, bytes) else data.read())
+    if file_name.lower().endswith(('.xlsx', '.xls')):
+        try:
+            return pd.read_excel(buffer, engine='calamine')
+        except ImportError:
+            buffer.seek(0)
+            return pd.read_excel(buffer)
+    try:
+        return pd.read_csv(buffer, engine='pyarrow')
+    except ImportError:
+        buffer.seek(0)
+        return pd.read_csv(buffer)
+
+
+def row_errors(mask, keys, column, message, columns=ERROR_COLUMNS):
+    """Error rows for every row flagged in ``mask``; ``keys`` fill the ID column (``columns[1]``)."""
+    rows = np.flatnonzero(np.asarray(mask))
+    return pd.DataFrame({
+        'Row': rows + 2,  # Spreadsheet row number: 1-based plus the header.
+        columns[1]: keys.to_numpy()[rows],
+        'Column': column,
+        'Error': message,
+    }, columns=columns)
+
+
+def stream_values(streams):
+    """One numeric value per delimited monthly entry, indexed by row (NaN where a value is not a number).
+
+    Spreadsheets store a single-month Streams cell as a number, so ``1000000.0`` parses like ``1000000``.
+    """
+    exploded = streams.fillna('').astype(str).str.split(STREAM_SEPARATORS).explode().str.strip()
+    exploded = exploded[exploded != '']
+    return pd.to_numeric(exploded.str.replace('_', '', regex=False), errors='coerce')
+
+
+def _stream_lists(streams):
+    """Integer stream lists per row, for rows that passed validation."""
+    values = stream_values(streams).astype(np.int64)
+    return values.groupby(level=0).agg(list).reindex(streams.index)
+
+
+def _stream_totals(streams):
+    """Sums and counts the delimited monthly streams per row; rows with a non-integer value get NaN."""
+    values = stream_values(streams)
+    grouped = values.groupby(level=0)
+    valid = (values.notna() & (values >= 0) & (values % 1 == 0)).groupby(level=0).all()
+    totals = grouped.sum().where(valid).reindex(streams.index)
+    counts = grouped.size().reindex(streams.index, fill_value=0)
+    return totals, counts
+
+
+def _tier_values(tiers):
+    """One Tier_Floor/Rate pair per delimited ``floor:rate`` entry, indexed by row (NaN where it does not parse)."""
+    pairs = tiers.fillna('').astype(str).str.split(TIER_SEPARATORS).explode().str.strip()
+    pairs = pairs[pairs != ''].str.split(':', n=1)
+    return pd.DataFrame({
+        'Tier_Floor': pd.to_numeric(pairs.str[0].str.strip().str.replace('_', '', regex=False), errors='coerce'),
+        'Rate': pd.to_numeric(pairs.str[1].str.strip(), errors='coerce'),
+    }, index=pairs.index)
+
+
+def _tier_lists(tiers):
+    """(floor, rate) tier lists per row, for rows that passed validation."""
+    values = _tier_values(tiers)
+    pairs = pd.Series(list(zip(values['Tier_Floor'].astype(np.int64).tolist(), values['Rate'].tolist())), index=values.index)
+    return pairs.groupby(level=0).agg(list).reindex(tiers.index)
+
+
+def _any_per_row(flags, index):
+    return flags.groupby(level=0).any().reindex(index, fill_value=False)
+
+
+def _tier_checks(tiers, index):
+    """Row masks for the rate-card rules ``build_rate_cards`` enforces: (malformed, no zero floor, negative, duplicate)."""
+    floors, rates = tiers['Tier_Floor'], tiers['Rate']
+    malformed = floors.isna() | rates.isna() | (floors % 1 != 0)
+    no_zero_floor = floors.groupby(level=0).min().reindex(index) != 0
+    negative = (floors < 0) | (rates < 0)
+    duplicate = pd.Series(tiers.reset_index().duplicated(['index', 'Tier_Floor']).to_numpy(), index=tiers.index)
+    return (_any_per_row(malformed, index), no_zero_floor,
+            _any_per_row(negative, index), _any_per_row(duplicate, index))
+
+
+def validate_contracts(raw_df):
+    """Normalizes and checks a contract file; returns (clean frame of valid rows, error frame)."""
+    missing = [col for col in REQUIRED_COLUMNS if col not in raw_df.columns]
+    if missing:
+        return pd.DataFrame(), pd.DataFrame(
+            [(1, '', ', '.join(missing), 'Required column missing.')], columns=ERROR_COLUMNS
+        )
+
+    df = raw_df.reset_index(drop=True).copy()
+    for col in OPTIONAL_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+    df['Contract_ID'] = df['Contract_ID'].astype(str).str.strip()
+    df['License'] = df['License'].fillna(LICENSE_NAME)
+    df['Currency'] = df['Currency'].fillna(FX_BASE_CURRENCY).astype(str).str.upper().str.strip()
+    df['Engine'] = df['Model'].astype(str).str.lower().str.strip().map(MODEL_ALIASES)
+    df['Start_Date'] = pd.to_datetime(df['Start_Date'], errors='coerce')
+    df['End_Date'] = pd.to_datetime(df['End_Date'], errors='coerce')
+    for col in ['Cost', 'Rate', 'MG_Amount']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df['Total_Streams'], df['Stream_Months'] = _stream_totals(df['Streams'])
+    df['Basis'] = df['Basis'].fillna('period').astype(str).str.lower().str.strip()
+    df['Method'] = df['Method'].fillna('graduated').astype(str).str.lower().str.strip()
+    df['Annual_Escalator'] = pd.to_numeric(df['Annual_Escalator'], errors='coerce').fillna(0.0)
+    tiers = _tier_values(df['Tiers'])
+    malformed, no_zero_floor, negative, duplicate = _tier_checks(tiers, df.index)
+
+    fixed = df['Engine'] == 'amortization'
+    usage = df['Engine'].isin(['variable-royalty', 'mg-hybrid'])
+    tiered = usage & (tiers.groupby(level=0).size().reindex(df.index, fill_value=0) > 0)
+    mg = df['Engine'] == 'mg-hybrid'
+    contracts = df['Contract_ID']
+    checks = [
+        (df['Contract_ID'].duplicated(keep=False), 'Contract_ID', 'Duplicate contract ID.'),
+        (df['Engine'].isna(), 'Model', 'Model must be Fixed, Variable or MG.'),
+        (df['Start_Date'].isna(), 'Start_Date', 'Invalid date. Use YYYY-MM-DD.'),
+        (fixed & ~(df['Cost'] > 0), 'Cost', 'Fixed-fee contracts need a cost greater than zero.'),
+        (fixed & df['End_Date'].isna(), 'End_Date', 'Invalid date. Use YYYY-MM-DD.'),
+        (fixed & (df['End_Date'] < df['Start_Date']), 'End_Date', 'End date must be after start date.'),
+        (usage & ~tiered & ~(df['Rate'] > 0), 'Rate', 'Usage contracts need a royalty rate greater than zero or Tiers.'),
+        (tiered & malformed, 'Tiers', 'Tiers must be floor:rate pairs, e.g. 0:0.005, 1000000:0.004.'),
+        (tiered & ~malformed & no_zero_floor, 'Tiers', 'Every rate card needs a first tier starting at 0.'),
+        (tiered & ~malformed & negative, 'Tiers', 'Tier floors and rates must be non-negative.'),
+        (tiered & ~malformed & duplicate, 'Tiers', 'Tier floors must be unique within a rate card.'),
+        (tiered & ~df['Basis'].isin(BASES), 'Basis', f"Basis must be one of {', '.join(BASES)}."),
+        (tiered & ~df['Method'].isin(METHODS), 'Method', f"Method must be one of {', '.join(METHODS)}."),
+        (tiered & ~(df['Annual_Escalator'] >= 0), 'Annual_Escalator', 'Annual escalator must not be negative.'),
+        (usage & (df['Stream_Months'] == 0), 'Streams', 'Enter at least one monthly stream value.'),
+        (usage & df['Total_Streams'].isna() & (df['Stream_Months'] > 0), 'Streams', 'Streams must be whole numbers.'),
+        (mg & ~(df['MG_Amount'] > 0), 'MG_Amount', 'Minimum guarantee must be greater than zero.'),
+    ]
+    errors = pd.concat([row_errors(mask, contracts, col, msg) for mask, col, msg in checks], ignore_index=True)
+    invalid = np.zeros(len(df), dtype=bool)
+    invalid[errors['Row'].to_numpy(dtype=int) - 2] = True
+    df.loc[tiered, 'Engine'] = df.loc[tiered, 'Engine'].map(TIERED_ENGINES)
+    return df[~invalid].reset_index(drop=True), errors.sort_values('Row', kind='mergesort').reset_index(drop=True)
+
+
+def _term_months(start, end):
+    """Whole months between the dates, inclusive, matching create_amortization_schedule."""
+    missing = (start.isna() | end.isna()).to_numpy()
+    months = term_months(start.to_numpy().astype('datetime64[D]'), end.to_numpy().astype('datetime64[D]'))
+    return pd.Series(np.where(missing, np.nan, months), index=start.index)
+
+
+def portfolio_summary(contracts_df):
+    """One row per contract with term, total expense, overage and ending prepaid, computed column-wise."""
+    df = contracts_df
+    fixed = (df['Engine'] == 'amortization').to_numpy()
+    mg = df['Engine'].isin(['mg-hybrid', 'tiered-mg']).to_numpy()
+    usage_expense = (df['Total_Streams'] * df['Rate']).to_numpy(dtype=float, copy=True)
+    for engine, column in (('tiered-royalty', 'Royalty_Expense'), ('tiered-mg', 'Usage_Expense')):
+        rows = (df['Engine'] == engine).to_numpy()
+        if rows.any():
+            # Rate-card usage depends on each period's tier, so price it through the schedule build.
+            schedule_df, _, _ = build_schedule(engine, portfolio_terms(df, engine))
+            totals = schedule_df.groupby('Contract_ID', sort=False)[column].sum()
+            usage_expense[rows] = totals.reindex(df['Contract_ID'].to_numpy()[rows]).to_numpy(dtype=float)
+    mg_amount = df['MG_Amount'].fillna(0).to_numpy(dtype=float)
+
+    periods = np.where(fixed, _term_months(df['Start_Date'], df['End_Date']).to_numpy(dtype=float),
+                       df['Stream_Months'].to_numpy(dtype=float))
+    total_expense = np.where(fixed, df['Cost'].to_numpy(dtype=float), usage_expense)
+    overage = np.where(mg, np.maximum(usage_expense - mg_amount, 0.0), 0.0)
+    ending_prepaid = np.where(mg, np.maximum(mg_amount - usage_expense, 0.0), 0.0)
+
+    return pd.DataFrame({
+        'Contract_ID': df['Contract_ID'],
+        'License': df['License'],
+        'Model': df['Engine'],
+        'Currency': df['Currency'],
+        'Start_Date': df['Start_Date'].dt.strftime('%Y-%m-%d'),
+        'Periods': periods.astype(int),
+        'Total_Expense': np.round(total_expense, 2),
+        'Overage_Expense': np.round(overage, 2),
+        'Ending_Prepaid': np.round(ending_prepaid, 2),
+    })
+
+
+def contract_request(row):
+    """Builds the (model, params) pair the runner expects for one validated contract row."""
+    params = {'start_date': row['Start_Date'].strftime('%Y-%m-%d'), 'license_name': row['License']}
+    if row['Engine'] == 'amortization':
+        params.update(cost=float(row['Cost']), end_date=row['End_Date'].strftime('%Y-%m-%d'))
+    else:
+        params['streams'] = [int(s) for s in _stream_lists(pd.Series([row['Streams']])).iloc[0]]
+        if row['Engine'] in TIERED_ENGINES.values():
+            params.update(
+                tiers=_tier_lists(pd.Series([row['Tiers']])).iloc[0], basis=row['Basis'], method=row['Method'],
+                annual_escalator=float(row['Annual_Escalator'])
+            )
+        else:
+            params['rate'] = float(row['Rate'])
+        if row['Engine'] in ('mg-hybrid', 'tiered-mg'):
+            params['mg_amount'] = float(row['MG_Amount'])
+    return row['Engine'], params
+
+
+def to_portfolio(contracts_df):
+    """Converts validated rows into the contract list used by ``engine.runner.run_portfolio``."""
+    portfolio = []
+    for _, row in contracts_df.iterrows():
+        model, params = contract_request(row)
+        portfolio.append({'contract_id': row['Contract_ID'], 'model': model, 'params': params})
+    return portfolio
+
+
+def portfolio_terms(contracts_df, engine):
+    """Terms frame for every validated contract routed to ``engine``, ready for ``build_schedule``."""
+    df = contracts_df[contracts_df['Engine'] == engine]
+    terms = pd.DataFrame({
+        'contract_id': df['Contract_ID'].to_numpy(),
+        'license_name': df['License'].to_numpy(),
+        'start_date': df['Start_Date'].dt.strftime('%Y-%m-%d').to_numpy(),
+    })
+    if engine == 'amortization':
+        terms['cost'] = df['Cost'].to_numpy(dtype=float)
+        terms['end_date'] = df['End_Date'].dt.strftime('%Y-%m-%d').to_numpy()
+    else:
+        terms['streams'] = _stream_lists(df['Streams']).to_numpy()
+        if engine in TIERED_ENGINES.values():
+            terms['tiers'] = _tier_lists(df['Tiers']).to_numpy()
+            terms['basis'] = df['Basis'].to_numpy()
+            terms['method'] = df['Method'].to_numpy()
+            terms['annual_escalator'] = df['Annual_Escalator'].to_numpy(dtype=float)
+        else:
+            terms['rate'] = df['Rate'].to_numpy(dtype=float)
+        if engine in ('mg-hybrid', 'tiered-mg'):
+            terms['mg_amount'] = df['MG_Amount'].to_numpy(dtype=float)
+    return terms
+
+
+def portfolio_journals(contracts_df):
+    """Journals for the whole portfolio, one vectorized build per engine; returns (frame, error message)."""
+    blocks = []
+    for engine in ENGINES:
+        terms = portfolio_terms(contracts_df, engine)
+        if terms.empty:
+            continue
+        schedule_df, _, error_msg = build_schedule(engine, terms)
+        if error_msg:
+            return pd.DataFrame(), error_msg
+        blocks.append(build_journals(engine, schedule_df, terms, LICENSE_NAME))
+        if engine == 'amortization':
+            # Same quarterly vendor payments as a single fixed-fee deal, so the forecast pays on schedule.
+            blocks.append(generate_portfolio_payment_journals(terms))
+    if not blocks:
+        return pd.DataFrame(), None
+    return pd.concat(blocks, ignore_index=True), None
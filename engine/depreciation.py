@@ -0,0 +1,347 @@
+"""Capex depreciation engine and capitalization-threshold classification for the Opex vs Capex module.
+
+Depreciation is a registered schedule model (``'depreciation'``), so one asset and a 100k-asset
+register run through the same vectorized core as the licensing models. Schedules and journals
+use the amortization layout: Posting_Date, expense, accumulated and NBV columns, and PPE /
+depreciation journal pairs in ``JOURNAL_COLUMNS``.
+"""
+import numpy as np
+import pandas as pd
+
+from engine.contract_import import row_errors, stream_values
+from engine.journals import AP_VENDOR
+from engine.schedule_models import (
+    register_schedule_model, build_schedule, build_journals, parse_dates, expand_periods,
+    month_end_axis, posted_cumsum, straight_line, capped_drawdown, first_error, leg_template,
+)
+
+FIXED_ASSETS = ('Property, Plant & Equipment', 15001)
+ACCUMULATED_DEPRECIATION = ('Accumulated Depreciation', 15901)
+DEPRECIATION_EXPENSE = ('Depreciation Expense', 60041)
+
+DEPRECIATION_METHODS = ('straight-line', 'declining-balance', 'sum-of-years-digits', 'units-of-production')
+METHOD_ALIASES = {
+    'sl': 'straight-line', 'straight line': 'straight-line', 'straight-line': 'straight-line',
+    'db': 'declining-balance', 'ddb': 'declining-balance', 'declining balance': 'declining-balance',
+    'declining-balance': 'declining-balance',
+    'syd': 'sum-of-years-digits', 'sum of years digits': 'sum-of-years-digits',
+    'sum-of-years-digits': 'sum-of-years-digits',
+    'uop': 'units-of-production', 'units of production': 'units-of-production',
+    'units-of-production': 'units-of-production',
+}
+DEFAULT_DB_FACTOR = 2.0  # Double-declining balance.
+
+# Capitalization policy applied to bulk spend.
+CAPITALIZATION_THRESHOLD = 5_000.00
+MIN_BENEFIT_MONTHS = 12
+EXPENSE_CATEGORIES = ('maintenance', 'repair', 'training', 'research', 'support')
+
+REGISTER_COLUMNS = ['Asset_ID', 'Description', 'Cost', 'Salvage_Value', 'In_Service_Date',
+                    'Useful_Life_Months', 'Method', 'DB_Factor', 'Total_Units', 'Units']
+ERROR_COLUMNS = ['Row', 'Asset_ID', 'Column', 'Error']
+
+
+# ==============================================================================
+# DEPRECIATION METHODS (rows of one method -> monthly expense)
+# ==============================================================================
+
+def _true_up(expense, totals, contract_idx, period_idx, periods):
+    """Rounds to cents and sets each asset's final month so the posted depreciation sums exactly to its base."""
+    expense = expense.round(2)
+    final = period_idx == periods[contract_idx] - 1
+    expense[final] = 0.0
+    expense[final] = (totals.round(2)[contract_idx[final]] - posted_cumsum(expense, contract_idx)[final]).round(2)
+    return expense
+
+
+def _declining_balance(cost, salvage, factor, periods, contract_idx, period_idx):
+    """Declining balance at factor / life per month, switching to straight-line once that is larger."""
+    rate = np.minimum(factor / periods, 1.0)[contract_idx]
+    opening = cost[contract_idx] * (1 - rate) ** period_idx
+    declining = opening * rate
+    remaining_straight_line = (opening - salvage[contract_idx]) / (periods[contract_idx] - period_idx)
+    switched = pd.Series(remaining_straight_line >= declining).groupby(contract_idx, sort=False).cummax().to_numpy()
+    first = np.r_[True, contract_idx[1:] != contract_idx[:-1]]
+    switch_row = switched & (first | ~np.r_[False, switched[:-1]])
+    # Once switched, the remaining base is spread evenly, so hold the switch-month amount.
+    held = pd.Series(np.where(switch_row, remaining_straight_line, np.nan)).groupby(contract_idx, sort=False).ffill().to_numpy()
+    expense, _ = capped_drawdown(np.where(switched, held, declining), cost - salvage, contract_idx)
+    return _true_up(expense, cost - salvage, contract_idx, period_idx, periods)
+
+
+def _sum_of_years_digits(depreciable, periods, contract_idx, period_idx):
+    """Sum-of-the-digits over the life in months: remaining months / sum of all month digits."""
+    remaining = periods[contract_idx] - period_idx
+    digits_total = periods * (periods + 1) / 2
+    expense = depreciable[contract_idx] * remaining / digits_total[contract_idx]
+    return _true_up(expense, depreciable, contract_idx, period_idx, periods)
+
+
+def _units_of_production(depreciable, total_units, units, contract_idx):
+    """Depreciable base times each month's share of lifetime units, stopping at the base."""
+    expense = depreciable[contract_idx] * units / total_units[contract_idx]
+    applied, _ = capped_drawdown(expense, depreciable, contract_idx)
+    return applied
+
+
+def _column(contracts, name, default):
+    if name not in contracts.columns:
+        return np.full(len(contracts), default, dtype=float)
+    return pd.to_numeric(contracts[name], errors='coerce').fillna(default).to_numpy(dtype=float)
+
+
+def _build_depreciation(contracts):
+    methods = contracts['method'].astype(str).str.lower().str.strip().map(METHOD_ALIASES).to_numpy(dtype=object)
+    in_service = parse_dates(contracts['in_service_date'])
+    cost = _column(contracts, 'cost', np.nan)
+    salvage = _column(contracts, 'salvage_value', 0.0)
+    factor = _column(contracts, 'factor', DEFAULT_DB_FACTOR)
+    life = _column(contracts, 'useful_life_months', 0).astype(np.int64)
+
+    uop = methods == 'units-of-production'
+    unit_lists = contracts['units'] if 'units' in contracts.columns else pd.Series([[]] * len(contracts))
+    unit_counts = np.where(uop, [len(u) if isinstance(u, (list, tuple, np.ndarray)) else 0 for u in unit_lists], 0)
+    uop_units = (np.concatenate([np.asarray(u, dtype=float) for u in unit_lists[uop]])
+                 if unit_counts.sum() else np.zeros(0))
+    entered_units = np.bincount(np.repeat(np.arange(len(contracts)), unit_counts), weights=uop_units,
+                                minlength=len(contracts))
+    total_units = _column(contracts, 'total_units', np.nan)
+    total_units = np.where(np.isnan(total_units), entered_units, total_units)
+
+    error_msg = first_error(contracts['contract_id'].to_numpy(), [
+        (pd.isna(methods), f"Method must be one of: {', '.join(DEPRECIATION_METHODS)}."),
+        (np.isnat(in_service), "Invalid Date Format. Use YYYY-MM-DD."),
+        (~(cost > 0), "Cost must be greater than zero."),
+        ((salvage < 0) | (salvage > cost), "Salvage value must be between zero and cost."),
+        (~uop & (life <= 0), "Useful life must be at least one month."),
+        (uop & (unit_counts == 0), "Enter at least one period of units."),
+        (uop & ~(total_units > 0), "Total units must be greater than zero."),
+        (factor <= 0, "Declining-balance factor must be greater than zero."),
+    ])
+    if error_msg:
+        return None, None, None, error_msg
+
+    periods = np.where(uop, unit_counts, life)
+    depreciable = cost - salvage
+    contract_idx, period_idx = expand_periods(periods)
+    row_methods = methods[contract_idx]
+    expense = np.zeros(len(contract_idx))
+
+    for method in DEPRECIATION_METHODS:
+        rows = row_methods == method
+        if not rows.any():
+            continue
+        idx, period = contract_idx[rows], period_idx[rows]
+        if method == 'straight-line':
+            expense[rows] = straight_line(depreciable, periods, idx, period)
+        elif method == 'declining-balance':
+            expense[rows] = _declining_balance(cost, salvage, factor, periods, idx, period)
+        elif method == 'sum-of-years-digits':
+            expense[rows] = _sum_of_years_digits(depreciable, periods, idx, period)
+        else:
+            expense[rows] = _units_of_production(depreciable, total_units, uop_units, idx)
+
+    accumulated = posted_cumsum(expense, contract_idx)
+    schedule = {
+        'Posting_Date': month_end_axis(in_service, contract_idx, period_idx),
+        'Depreciation_Expense': expense,
+        'Accumulated_Depreciation': accumulated,
+        'Net_Book_Value_NBV': (cost[contract_idx] - accumulated).round(2),
+    }
+    return schedule, contract_idx, {'total_months': periods, 'depreciable_base': depreciable}, None
+
+
+register_schedule_model(
+    'depreciation', "Capex Depreciation", _build_depreciation,
+    legs=[
+        leg_template('CAPITALIZE', 'cost', FIXED_ASSETS, AP_VENDOR, date='first'),
+        leg_template('DEPRECIATION', 'Depreciation_Expense', DEPRECIATION_EXPENSE, ACCUMULATED_DEPRECIATION),
+    ],
+    inputs=[('cost', "Asset Cost ($)", 'money', 250_000.00),
+            ('salvage_value', "Salvage Value ($)", 'money', 25_000.00),
+            ('in_service_date', "In-Service Date", 'date', '2024-01-01'),
+            ('useful_life_months', "Useful Life (Months)", 'months', 60),
+            ('method', "Depreciation Method", 'choice', 'straight-line'),
+            ('factor', "Declining-Balance Factor", 'rate', DEFAULT_DB_FACTOR),
+            ('units', "Units Produced per Month", 'streams', [])],
+    description="Capitalized cost less salvage depreciated from the in-service month over the useful life.",
+    choices={'method': DEPRECIATION_METHODS},
+)
+
+
+# ==============================================================================
+# SINGLE ASSET
+# ==============================================================================
+
+def create_depreciation_schedule(cost, salvage_value, in_service_date_str, useful_life_months,
+                                 method='straight-line', factor=DEFAULT_DB_FACTOR, units=None):
+    """Calculates the monthly depreciation schedule and NBV for one asset."""
+    schedule_df, _, error_msg = build_schedule('depreciation', {
+        'cost': cost, 'salvage_value': salvage_value, 'in_service_date': in_service_date_str,
+        'useful_life_months': useful_life_months, 'method': method, 'factor': factor, 'units': list(units or []),
+    })
+    return schedule_df, error_msg
+
+
+def generate_depreciation_journals(schedule_df, asset_name, cost):
+    """Generates the capitalization JE and the monthly depreciation JEs."""
+    return build_journals('depreciation', schedule_df, {'cost': cost}, asset_name)
+
+
+# ==============================================================================
+# FIXED-ASSET REGISTER
+# ==============================================================================
+
+def _unit_lists(units, rows):
+    """Parses the delimited monthly units for ``rows`` (same format as Streams); other rows get an empty list."""
+    values = stream_values(units[rows])
+    parsed = values.groupby(level=0).agg(list)
+    lists = pd.Series([[]] * len(units), index=units.index, dtype=object)
+    lists[parsed.index] = parsed
+    invalid = values.isna() | (values < 0)
+    return lists, invalid.groupby(level=0).any().reindex(units.index, fill_value=False)
+
+
+def validate_asset_register(raw_df):
+    """Normalizes and checks a fixed-asset register; returns (clean frame of valid rows, error frame)."""
+    missing = [col for col in ['Asset_ID', 'Cost', 'In_Service_Date', 'Method'] if col not in raw_df.columns]
+    if missing:
+        return pd.DataFrame(), pd.DataFrame(
+            [(1, '', ', '.join(missing), 'Required column missing.')], columns=ERROR_COLUMNS
+        )
+
+    df = raw_df.reset_index(drop=True).copy()
+    for col in REGISTER_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+    df['Asset_ID'] = df['Asset_ID'].astype(str).str.strip()
+    df['Description'] = df['Description'].fillna(df['Asset_ID'])
+    df['Method'] = df['Method'].astype(str).str.lower().str.strip().map(METHOD_ALIASES)
+    df['In_Service_Date'] = pd.to_datetime(df['In_Service_Date'], errors='coerce')
+    for col in ['Cost', 'Salvage_Value', 'Useful_Life_Months', 'DB_Factor', 'Total_Units']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df['Salvage_Value'] = df['Salvage_Value'].fillna(0.0)
+    df['DB_Factor'] = df['DB_Factor'].fillna(DEFAULT_DB_FACTOR)
+
+    uop = df['Method'] == 'units-of-production'
+    df['Units'], bad_units = _unit_lists(df['Units'], uop)
+    unit_counts = df['Units'].str.len()
+    assets = df['Asset_ID']
+    checks = [
+        (df['Asset_ID'].duplicated(keep=False), 'Asset_ID', 'Duplicate asset ID.'),
+        (df['Method'].isna(), 'Method', f"Method must be one of: {', '.join(DEPRECIATION_METHODS)}."),
+        (df['In_Service_Date'].isna(), 'In_Service_Date', 'Invalid date. Use YYYY-MM-DD.'),
+        (~(df['Cost'] > 0), 'Cost', 'Cost must be greater than zero.'),
+        ((df['Salvage_Value'] < 0) | (df['Salvage_Value'] > df['Cost']), 'Salvage_Value',
+         'Salvage value must be between zero and cost.'),
+        (~uop & ~(df['Useful_Life_Months'] >= 1), 'Useful_Life_Months', 'Useful life must be at least one month.'),
+        (uop & (unit_counts == 0), 'Units', 'Enter at least one period of units.'),
+        (uop & bad_units, 'Units', 'Units must be non-negative numbers.'),
+        (uop & (df['Total_Units'] <= 0), 'Total_Units', 'Total units must be greater than zero.'),
+        (df['DB_Factor'] <= 0, 'DB_Factor', 'Declining-balance factor must be greater than zero.'),
+    ]
+    errors = pd.concat([row_errors(mask, assets, col, msg, ERROR_COLUMNS) for mask, col, msg in checks], ignore_index=True)
+    invalid = np.zeros(len(df), dtype=bool)
+    invalid[errors['Row'].to_numpy(dtype=int) - 2] = True
+    return df[~invalid].reset_index(drop=True), errors.sort_values('Row', kind='mergesort').reset_index(drop=True)
+
+
+def _register_terms(register_df):
+    return pd.DataFrame({
+        'contract_id': register_df['Asset_ID'].to_numpy(),
+        'license_name': register_df['Description'].to_numpy(),
+        'cost': register_df['Cost'].to_numpy(dtype=float),
+        'salvage_value': register_df['Salvage_Value'].to_numpy(dtype=float),
+        'in_service_date': register_df['In_Service_Date'].to_numpy(),
+        'useful_life_months': register_df['Useful_Life_Months'].fillna(0).to_numpy(dtype=np.int64),
+        'method': register_df['Method'].to_numpy(),
+        'factor': register_df['DB_Factor'].to_numpy(dtype=float),
+        'total_units': register_df['Total_Units'].to_numpy(dtype=float),
+        'units': register_df['Units'].to_numpy(),
+    })
+
+
+def depreciate_register(register_df, journals=True):
+    """Schedules (and optionally journals) for every asset in a validated register.
+
+    Returns (schedule_df, journal_df, error message); both frames carry an Asset_ID column and the
+    journals use the asset description as the License.
+    """
+    terms = _register_terms(register_df)
+    schedule_df, _, error_msg = build_schedule('depreciation', terms)
+    if error_msg:
+        return pd.DataFrame(), pd.DataFrame(), error_msg
+    journal_df = build_journals('depreciation', schedule_df, terms, '') if journals else pd.DataFrame()
+    return (schedule_df.rename(columns={'Contract_ID': 'Asset_ID'}),
+            journal_df.rename(columns={'Contract_ID': 'Asset_ID'}), None)
+
+
+def register_summary(register_df, schedule_df):
+    """One row per method: asset count, cost, depreciable base, depreciation to date and NBV at period end."""
+    period_end = schedule_df.groupby('Asset_ID', sort=False).tail(1).set_index('Asset_ID')
+    df = register_df.set_index('Asset_ID')
+    df = df.assign(
+        Depreciable_Base=df['Cost'] - df['Salvage_Value'],
+        Total_Depreciation=period_end['Accumulated_Depreciation'].reindex(df.index),
+        Ending_NBV=period_end['Net_Book_Value_NBV'].reindex(df.index),
+    )
+    return df.groupby('Method').agg(
+        Assets=('Cost', 'size'), Cost=('Cost', 'sum'), Depreciable_Base=('Depreciable_Base', 'sum'),
+        Total_Depreciation=('Total_Depreciation', 'sum'), Ending_NBV=('Ending_NBV', 'sum'),
+    ).round(2).reset_index()
+
+
+# ==============================================================================
+# CAPITALIZATION POLICY (bulk spend)
+# ==============================================================================
+
+def classify_spend(spend_df, threshold=CAPITALIZATION_THRESHOLD, min_benefit_months=MIN_BENEFIT_MONTHS):
+    """Applies the capitalization policy to each spend line; returns (classified frame, error message).
+
+    A line is Capex when it meets the threshold, benefits more than ``min_benefit_months`` and is
+    not a routine expense category (maintenance, repair, training, research, support).
+    """
+    missing = [col for col in ['Amount', 'Benefit_Months'] if col not in spend_df.columns]
+    if missing:
+        return pd.DataFrame(), f"Spend file is missing required column(s): {', '.join(missing)}."
+
+    amount = pd.to_numeric(spend_df['Amount'], errors='coerce')
+    benefit = pd.to_numeric(spend_df['Benefit_Months'], errors='coerce')
+    category = (spend_df['Category'] if 'Category' in spend_df.columns else pd.Series('', index=spend_df.index))
+    routine = category.fillna('').astype(str).str.lower().str.contains('|'.join(EXPENSE_CATEGORIES))
+
+    conditions = [
+        amount.isna() | benefit.isna(),
+        routine.to_numpy(),
+        (amount < threshold).to_numpy(),
+        (benefit <= min_benefit_months).to_numpy(),
+    ]
+    reasons = [
+        "Missing amount or benefit period",
+        "Routine expense category",
+        f"Below ${threshold:,.0f} capitalization threshold",
+        f"Benefit period of {min_benefit_months} months or less",
+    ]
+    classified = spend_df.copy()
+    classified['Treatment'] = np.where(np.logical_or.reduce(conditions), 'Opex', 'Capex')
+    classified['Reason'] = np.select(conditions, reasons, default="Meets capitalization policy")
+    return classified, None
+
+
+def spend_to_register(classified_df, method='straight-line', in_service_date=None):
+    """Turns the Capex lines of a classified spend file into asset-register rows."""
+    capex = classified_df[classified_df['Treatment'] == 'Capex'].reset_index(drop=True)
+    ids = capex['Spend_ID'] if 'Spend_ID' in capex.columns else pd.Series(capex.index).map('SPEND-{}'.format)
+    if 'Date' in capex.columns:
+        dates = pd.to_datetime(capex['Date'], errors='coerce')
+    else:
+        dates = pd.Series(pd.to_datetime(in_service_date), index=capex.index)
+    return pd.DataFrame({
+        'Asset_ID': ids.astype(str).to_numpy(),
+        'Description': (capex['Description'] if 'Description' in capex.columns else ids).to_numpy(),
+        'Cost': pd.to_numeric(capex['Amount']).to_numpy(dtype=float),
+        'Salvage_Value': 0.0,
+        'In_Service_Date': dates.to_numpy(),
+        'Useful_Life_Months': pd.to_numeric(capex['Benefit_Months']).to_numpy(),
+        'Method': method,
+    }, columns=REGISTER_COLUMNS[:7])
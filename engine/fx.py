@@ -0,0 +1,148 @@
+"""Foreign-exchange rate table and reporting-currency translation.
+
+Rates are quoted as units of ``FX_BASE_CURRENCY`` per one unit of ``Currency``.
+Translation into any other reporting currency goes through the base (cross rate).
+"""
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+FX_BASE_CURRENCY = "USD"
+REPORTING_CURRENCY = "USD"
+FX_RATES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "fx_rates.csv")
+FX_COLUMNS = ['Rate_Date', 'Currency', 'Month_End_Rate', 'Average_Rate']
+
+# Period flows translate at the average rate, balances at the month-end (closing) rate.
+FLOW_COLUMNS = ['Amortization_Expense', 'Royalty_Expense', 'Usage_Expense', 'Prepaid_Amortization', 'Overage_Expense']
+BALANCE_COLUMNS = ['Accumulated_Amortization', 'Net_Book_Value_NBV', 'Accrued_Payable', 'Ending_Prepaid', 'Accrued_Overage']
+AVERAGE_RATE_JE_TYPES = ['EXPENSE', 'ROYALTY', 'MG_USAGE', 'MG_OVERAGE']
+# Rates are month-end quotes, so a date more than a month past the latest quote has no rate.
+RATE_TOLERANCE = pd.Timedelta(days=31)
+
+
+@lru_cache(maxsize=8)
+def _read_fx_rates(path, modified_time):
+    """Reads and sorts the rate file; keyed on mtime so an edited file is reloaded."""
+    rates = pd.read_csv(path, parse_dates=['Rate_Date'])
+    missing = [col for col in FX_COLUMNS if col not in rates.columns]
+    if missing:
+        raise ValueError(f"FX rate file is missing columns: {', '.join(missing)}")
+    rates = rates[FX_COLUMNS].copy()
+    rates['Rate_Date'] = rates['Rate_Date'].astype('datetime64[ns]')
+    rates['Currency'] = rates['Currency'].str.upper().str.strip()
+    return rates.sort_values('Rate_Date', kind='mergesort').reset_index(drop=True)
+
+
+def load_fx_rates(path=FX_RATES_PATH):
+    """Returns the FX rate table, cached in memory across runs. Treat the result as read-only."""
+    return _read_fx_rates(path, os.path.getmtime(path))
+
+
+def available_currencies(fx_rates=None):
+    """Lists the reporting base plus every currency present in the rate table."""
+    if fx_rates is None:
+        fx_rates = load_fx_rates()
+    return [FX_BASE_CURRENCY] + sorted(c for c in fx_rates['Currency'].unique() if c != FX_BASE_CURRENCY)
+
+
+def _lookup_rates(dates, currencies, fx_rates, rate_column):
+    """Vectorized as-of lookup: the latest base rate on or before each date (within RATE_TOLERANCE), per currency."""
+    left = pd.DataFrame({
+        'Rate_Date': pd.to_datetime(dates).to_numpy().astype('datetime64[ns]'),
+        'Currency': pd.Series(currencies).str.upper().to_numpy(),
+        '_row': range(len(currencies)),
+    }).sort_values('Rate_Date', kind='mergesort')
+    matched = pd.merge_asof(
+        left, fx_rates[['Rate_Date', 'Currency', rate_column]],
+        on='Rate_Date', by='Currency', direction='backward', tolerance=RATE_TOLERANCE
+    ).sort_values('_row')
+    rates = matched[rate_column].to_numpy(dtype=float, copy=True)
+    rates[matched['Currency'].to_numpy() == FX_BASE_CURRENCY] = 1.0
+    return rates
+
+
+def fx_rates_for(dates, currencies, reporting_currency=REPORTING_CURRENCY, fx_rates=None, rate_column='Month_End_Rate'):
+    """Returns one translation rate per row (currency -> reporting currency), NaN where no rate covers the date."""
+    if fx_rates is None:
+        fx_rates = load_fx_rates()
+    rates = _lookup_rates(dates, currencies, fx_rates, rate_column)
+    reporting_currency = reporting_currency.upper()
+    if reporting_currency != FX_BASE_CURRENCY:
+        rates = rates / _lookup_rates(dates, [reporting_currency] * len(rates), fx_rates, rate_column)
+    return rates
+
+
+def _currency_column(df, currency):
+    if 'Currency' in df.columns:
+        return df['Currency'].to_numpy()
+    return [currency or FX_BASE_CURRENCY] * len(df)
+
+
+def _missing_rate_error(currencies, dates, rates):
+    """Names each currency without a rate and the date range it is missing for."""
+    missing = pd.DataFrame({
+        'Currency': pd.Series(currencies).astype(str).to_numpy(),
+        'Date': pd.to_datetime(dates).to_numpy(),
+    })[pd.isna(rates)]
+    ranges = missing.groupby('Currency')['Date'].agg(['min', 'max'])
+    details = [
+        f"{currency} ({first:%Y-%m-%d})" if first == last else f"{currency} ({first:%Y-%m-%d} to {last:%Y-%m-%d})"
+        for currency, (first, last) in ranges.iterrows()
+    ]
+    return f"No FX rate available for: {', '.join(details)}. Extend data/fx_rates.csv to cover these dates."
+
+
+def translate_schedule(schedule_df, currency=None, reporting_currency=REPORTING_CURRENCY, fx_rates=None):
+    """Adds reporting-currency columns to a schedule (flows at average rate, balances at month-end rate).
+
+    ``currency`` applies to the whole frame unless it already carries a ``Currency`` column
+    (a multi-contract portfolio frame).
+    """
+    if schedule_df.empty:
+        return schedule_df.copy(), None
+
+    currencies = _currency_column(schedule_df, currency)
+    dates = schedule_df['Posting_Date']
+    translated = schedule_df.copy()
+    translated['Currency'] = currencies
+    translated['Reporting_Currency'] = reporting_currency
+
+    for rate_column, columns in (('Average_Rate', FLOW_COLUMNS), ('Month_End_Rate', BALANCE_COLUMNS)):
+        present = [col for col in columns if col in translated.columns]
+        if not present:
+            continue
+        rates = fx_rates_for(dates, currencies, reporting_currency, fx_rates, rate_column)
+        if pd.isna(rates).any():
+            return pd.DataFrame(), _missing_rate_error(currencies, dates, rates)
+        translated[f'FX_{rate_column}'] = rates
+        for col in present:
+            translated[f'{col}_Reporting'] = (translated[col].to_numpy(dtype=float) * rates).round(2)
+
+    return translated, None
+
+
+def translate_journals(journal_df, currency=None, reporting_currency=REPORTING_CURRENCY, fx_rates=None):
+    """Adds Debit/Credit in reporting currency to a journal frame.
+
+    Accrual JE types use the average rate; prepayments and payments use the month-end rate.
+    Both legs of an entry share date, currency and JE_Type, so translated entries stay balanced.
+    """
+    if journal_df.empty:
+        return journal_df.copy(), None
+
+    currencies = _currency_column(journal_df, currency)
+    dates = journal_df['Date']
+    average = fx_rates_for(dates, currencies, reporting_currency, fx_rates, 'Average_Rate')
+    month_end = fx_rates_for(dates, currencies, reporting_currency, fx_rates, 'Month_End_Rate')
+    rates = pd.Series(month_end).where(~journal_df['JE_Type'].isin(AVERAGE_RATE_JE_TYPES).to_numpy(), average).to_numpy()
+    if pd.isna(rates).any():
+        return pd.DataFrame(), _missing_rate_error(currencies, dates, rates)
+
+    translated = journal_df.copy()
+    translated['Currency'] = currencies
+    translated['Reporting_Currency'] = reporting_currency
+    translated['FX_Rate'] = rates
+    translated['Debit_Reporting'] = (translated['Debit'].to_numpy(dtype=float) * rates).round(2)
+    translated['Credit_Reporting'] = (translated['Credit'].to_numpy(dtype=float) * rates).round(2)
+    return translated, None
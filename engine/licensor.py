@@ -0,0 +1,102 @@
+"""Licensor-side (licensing-out) mirror of the content licensing schedules.
+
+The licensor's deferred revenue, revenue recognition and receivable columns are views over the
+same arrays as the licensee schedule. ``generate_intercompany_journals`` writes both sides of a
+deal with ``build_journals``: the licensee side from the model's own leg templates, the licensor
+side from the mirror templates in ``LICENSOR_LEGS``.
+"""
+import pandas as pd
+
+from engine.journals import journal_legs, CASH
+from engine.schedule_models import build_journals, leg_template
+
+# Licensor accounts
+DEFERRED_REVENUE = ('Deferred Licensing Revenue', 24001)
+DEFERRED_REVENUE_MG = ('Deferred Licensing Revenue (MG)', 24001)
+LICENSING_REVENUE = ('Licensing Revenue', 40011)
+AR_LICENSEE = ('Accounts Receivable (Licensee)', 12001)
+AR_ROYALTY = ('Accounts Receivable (Royalty)', 12001)
+
+# Licensee schedule column -> licensor column, per schedule layout.
+MIRROR_COLUMNS = {
+    'Net_Book_Value_NBV': {
+        'Amortization_Expense': 'Revenue_Recognized',
+        'Accumulated_Amortization': 'Cumulative_Revenue',
+        'Net_Book_Value_NBV': 'Deferred_Revenue',
+    },
+    'Accrued_Payable': {
+        'Streams': 'Streams',
+        'Royalty_Expense': 'Royalty_Revenue',
+        'Accrued_Payable': 'Accrued_Receivable',
+    },
+    'Ending_Prepaid': {
+        'Streams': 'Streams',
+        'Usage_Expense': 'Usage_Revenue',
+        'Prepaid_Amortization': 'Deferred_Revenue_Released',
+        'Overage_Expense': 'Overage_Revenue',
+        'Ending_Prepaid': 'Ending_Deferred_Revenue',
+        'Accrued_Overage': 'Accrued_Receivable',
+    },
+}
+
+
+def create_licensor_schedule(schedule_df):
+    """Returns the licensor view of a licensee schedule, sharing its column buffers (no copy)."""
+    if schedule_df.empty:
+        return pd.DataFrame()
+    for marker, mapping in MIRROR_COLUMNS.items():
+        if marker in schedule_df.columns:
+            data = {'Posting_Date': schedule_df['Posting_Date'].to_numpy()}
+            data.update({target: schedule_df[source].to_numpy() for source, target in mapping.items()})
+            return pd.DataFrame(data, copy=False)
+    return pd.DataFrame()
+
+
+# Licensor mirror of each licensee model's journal templates.
+LICENSOR_LEGS = {
+    'amortization': [
+        leg_template('DEFERRED_REVENUE', 'cost', AR_LICENSEE, DEFERRED_REVENUE, date='first'),
+        leg_template('REVENUE', 'Amortization_Expense', DEFERRED_REVENUE, LICENSING_REVENUE),
+    ],
+    'mg-hybrid': [
+        leg_template('MG_RECEIPT', 'mg_amount', CASH, DEFERRED_REVENUE_MG, date='start'),
+        leg_template('MG_REVENUE', 'Prepaid_Amortization', DEFERRED_REVENUE_MG, LICENSING_REVENUE, skip_zero=True),
+        leg_template('MG_OVERAGE_REVENUE', 'Overage_Expense', AR_ROYALTY, LICENSING_REVENUE, skip_zero=True),
+    ],
+    'variable-royalty': [
+        leg_template('ROYALTY_REVENUE', 'Royalty_Expense', AR_ROYALTY, LICENSING_REVENUE),
+    ],
+}
+
+
+def _schedule_model(schedule_df):
+    """Registered model a licensee schedule came from, told apart by its balance column."""
+    for marker, model in (('Net_Book_Value_NBV', 'amortization'), ('Ending_Prepaid', 'mg-hybrid')):
+        if marker in schedule_df.columns:
+            return model
+    return 'variable-royalty'
+
+
+def generate_intercompany_journals(schedule_df, license_name, upfront_amount=None, start_date_str=None, payment_df=None):
+    """Generates (licensee journals, licensor journals) for one deal from the registry leg templates.
+
+    Fixed-fee schedules take ``upfront_amount`` (the license fee) and optionally the licensee's
+    ``payment_df`` to mirror as cash receipts; MG schedules take ``upfront_amount`` (the MG) and
+    ``start_date_str``. The licensee side is exactly ``build_journals`` for the model.
+    """
+    if schedule_df.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    model = _schedule_model(schedule_df)
+    terms = {'amortization': {'cost': upfront_amount},
+             'mg-hybrid': {'mg_amount': upfront_amount, 'start_date': start_date_str}}.get(model, {})
+    licensee = build_journals(model, schedule_df, terms, license_name)
+    licensor = build_journals(model, schedule_df, terms, license_name, legs=LICENSOR_LEGS[model])
+
+    if model == 'amortization' and payment_df is not None and not payment_df.empty:
+        debits = payment_df['Debit'].to_numpy(dtype=float)
+        receipts, _ = journal_legs(
+            payment_df['Date'].to_numpy()[debits > 0], debits[debits > 0], 'RECEIPT', license_name, CASH, AR_LICENSEE
+        )
+        licensor = pd.concat([licensor, receipts], ignore_index=True)
+    return licensee, licensor
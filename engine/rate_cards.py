@@ -0,0 +1,263 @@
+"""Tiered and escalating royalty rate cards for the usage models.
+
+A rate card is a set of tiers (``Tier_Floor`` volume breakpoints, first floor 0, each with a
+``Rate``) plus how volume is measured and priced:
+
+* ``basis``: ``'period'`` prices each month's volume on its own; ``'cumulative'`` prices against
+  contract-to-date volume, so later months move up the tiers.
+* ``method``: ``'graduated'`` charges each slice of volume at its own tier's rate; ``'volume'``
+  charges the whole period's volume at the rate of the tier reached.
+* ``annual_escalator``: rates step up by this fraction every 12 months from contract start.
+
+Many cards are priced together by offsetting each card's breakpoints into its own key range and
+doing a single ``np.searchsorted``. Portfolios with per-territory cards never loop per stream.
+The rate-card royalty and MG models are registered schedule models (``'tiered-royalty'`` and
+``'tiered-mg'``), so a single deal and a whole portfolio build through the same pass.
+"""
+import numpy as np
+import pandas as pd
+
+from engine.schedule_models import (
+    SCHEDULE_MODELS, register_schedule_model, build_schedule, parse_dates, expand_periods, month_end_axis,
+    posted_cumsum, capped_drawdown, first_error, stream_periods, usage_checks,
+)
+
+BASES = ('period', 'cumulative')
+METHODS = ('graduated', 'volume')
+# Each card owns a key range of this width; volumes must stay below it (~1.1 trillion streams).
+CARD_SPAN = 2 ** 40
+
+
+def build_rate_cards(cards_df):
+    """Compiles a long frame of tiers (Card_ID, Tier_Floor, Rate[, Basis, Method, Annual_Escalator]) for pricing.
+
+    Returns (compiled cards, error message).
+    """
+    if cards_df.empty:
+        return None, "Enter at least one rate tier."
+    cards = cards_df.copy()
+    for col, default in (('Basis', 'period'), ('Method', 'graduated'), ('Annual_Escalator', 0.0)):
+        if col not in cards.columns:
+            cards[col] = default
+    cards = cards.sort_values(['Card_ID', 'Tier_Floor'], kind='mergesort').reset_index(drop=True)
+
+    card_ids, card_index = np.unique(cards['Card_ID'].to_numpy(), return_inverse=True)
+    floors = cards['Tier_Floor'].to_numpy(dtype=np.int64)
+    rates = cards['Rate'].to_numpy(dtype=float)
+    first_tier = np.r_[True, card_index[1:] != card_index[:-1]]
+
+    if (floors[first_tier] != 0).any():
+        return None, "Every rate card needs a first tier starting at 0."
+    if (floors < 0).any() or (floors >= CARD_SPAN).any() or (rates < 0).any():
+        return None, "Tier floors and rates must be non-negative."
+    if (~first_tier & (np.diff(floors, prepend=0) == 0)).any():
+        return None, "Tier floors must be unique within a rate card."
+    per_card = cards.loc[first_tier, ['Basis', 'Method']]
+    if not per_card['Basis'].isin(BASES).all() or not per_card['Method'].isin(METHODS).all():
+        return None, f"Basis must be one of {BASES}; method one of {METHODS}."
+
+    # Cost of filling every lower tier completely, so graduated pricing is one lookup.
+    next_floor = np.r_[floors[1:], 0]
+    tier_width = np.where(np.r_[~first_tier[1:], False], next_floor - floors, 0)
+    tier_cost = tier_width * rates
+    cum_cost = np.cumsum(tier_cost) - tier_cost
+    cum_cost -= np.maximum.accumulate(np.where(first_tier, cum_cost, 0))
+
+    return {
+        'card_ids': card_ids,
+        'keys': card_index.astype(np.int64) * CARD_SPAN + floors,
+        'floors': floors,
+        'rates': rates,
+        'cum_cost': cum_cost,
+        'basis': per_card['Basis'].to_numpy(),
+        'method': per_card['Method'].to_numpy(),
+        'escalator': cards.loc[first_tier, 'Annual_Escalator'].to_numpy(dtype=float),
+    }, None
+
+
+def _tier_lookup(cards, card_pos, volume):
+    """Index of the tier each volume falls in, within its own card."""
+    keys = card_pos.astype(np.int64) * CARD_SPAN + volume.astype(np.int64)
+    return np.searchsorted(cards['keys'], keys, side='right') - 1
+
+
+def _graduated_total(cards, card_pos, volume):
+    tier = _tier_lookup(cards, card_pos, volume)
+    return cards['cum_cost'][tier] + (volume - cards['floors'][tier]) * cards['rates'][tier]
+
+
+def price_usage(usage_df, cards):
+    """Prices a long usage frame (Contract_ID, Card_ID, Period_Index, Streams[, Territory]).
+
+    Rows must be in period order within each contract/territory. Adds ``Royalty_Expense`` and
+    ``Effective_Rate`` (expense per stream) columns.
+    """
+    card_pos = np.searchsorted(cards['card_ids'], usage_df['Card_ID'].to_numpy())
+    if (card_pos >= len(cards['card_ids'])).any() or (cards['card_ids'][np.minimum(card_pos, len(cards['card_ids']) - 1)] != usage_df['Card_ID'].to_numpy()).any():
+        raise ValueError("Usage references a Card_ID that is not in the rate cards.")
+
+    volume = usage_df['Streams'].to_numpy(dtype=np.int64)
+    group_cols = [col for col in ('Contract_ID', 'Territory') if col in usage_df.columns]
+    if group_cols:
+        cumulative = usage_df.groupby(group_cols, sort=False)['Streams'].cumsum().to_numpy(dtype=np.int64)
+    else:
+        cumulative = np.cumsum(volume)
+
+    cumulative_basis = cards['basis'][card_pos] == 'cumulative'
+    graduated = cards['method'][card_pos] == 'graduated'
+
+    # Graduated: price the slice of the tier curve this period's volume covers.
+    upper = np.where(cumulative_basis, cumulative, volume)
+    lower = np.where(cumulative_basis, cumulative - volume, 0)
+    graduated_expense = _graduated_total(cards, card_pos, upper) - _graduated_total(cards, card_pos, lower)
+    # Volume: every unit at the rate of the tier reached.
+    volume_expense = volume * cards['rates'][_tier_lookup(cards, card_pos, upper)]
+
+    escalation = (1 + cards['escalator'][card_pos]) ** (usage_df['Period_Index'].to_numpy() // 12)
+    expense = np.where(graduated, graduated_expense, volume_expense) * escalation
+
+    priced = usage_df.copy()
+    priced['Royalty_Expense'] = expense
+    priced['Effective_Rate'] = np.divide(expense, volume, out=np.zeros_like(expense), where=volume > 0)
+    return priced
+
+
+def parse_tiers_input(tiers_text):
+    """Parses 'floor:rate' pairs (comma or newline separated), e.g. '0:0.005, 1000000:0.004'."""
+    pairs = [p.strip() for p in tiers_text.replace("\n", ",").split(",") if p.strip()]
+    tiers = []
+    for pair in pairs:
+        floor, _, rate = pair.partition(":")
+        try:
+            tiers.append((int(floor.strip().replace("_", "")), float(rate)))
+        except ValueError:
+            return []
+    return tiers
+
+
+def _option(contracts, name, default):
+    """Per-contract rate-card option; a missing term or blank cell takes the default."""
+    if name not in contracts.columns:
+        return np.full(len(contracts), default)
+    return contracts[name].where(contracts[name].notna(), default).to_numpy()
+
+
+def _price_contracts(contracts, checks=()):
+    """Prices every contract's streams against its own ``tiers`` card in one pass.
+
+    Returns (streams, start dates, contract index, period index, priced frame, error message).
+    """
+    streams, periods = stream_periods(contracts)
+    start_dates = parse_dates(contracts['start_date'])
+    tier_lists = [list(t) for t in contracts['tiers']]
+    tier_counts = np.array([len(t) for t in tier_lists], dtype=np.int64)
+    error_msg = first_error(contracts['contract_id'].to_numpy(), usage_checks(contracts, periods, start_dates) + [
+        *checks,
+        (tier_counts == 0, "Enter at least one rate tier."),
+    ])
+    if error_msg:
+        return None, None, None, None, None, error_msg
+
+    pairs = [tier for tiers in tier_lists for tier in tiers]
+    cards, error_msg = build_rate_cards(pd.DataFrame({
+        'Card_ID': np.repeat(np.arange(len(contracts)), tier_counts),
+        'Tier_Floor': np.array([floor for floor, _ in pairs], dtype=np.int64),
+        'Rate': np.array([rate for _, rate in pairs], dtype=float),
+        'Basis': np.repeat(_option(contracts, 'basis', 'period'), tier_counts),
+        'Method': np.repeat(_option(contracts, 'method', 'graduated'), tier_counts),
+        'Annual_Escalator': np.repeat(_option(contracts, 'annual_escalator', 0.0).astype(float), tier_counts),
+    }))
+    if error_msg:
+        return None, None, None, None, None, error_msg
+
+    contract_idx, period_idx = expand_periods(periods)
+    priced = price_usage(pd.DataFrame({
+        'Contract_ID': contract_idx, 'Card_ID': contract_idx, 'Period_Index': period_idx, 'Streams': streams,
+    }), cards)
+    return streams, start_dates, contract_idx, period_idx, priced, None
+
+
+def _build_tiered_royalty(contracts):
+    streams, start_dates, contract_idx, period_idx, priced, error_msg = _price_contracts(contracts)
+    if error_msg:
+        return None, None, None, error_msg
+
+    expense = priced['Royalty_Expense'].to_numpy().round(2)
+    schedule = {
+        'Posting_Date': month_end_axis(start_dates, contract_idx, period_idx),
+        'Streams': streams,
+        'Effective_Rate': priced['Effective_Rate'].to_numpy().round(6),
+        'Royalty_Expense': expense,
+        'Accrued_Payable': posted_cumsum(expense, contract_idx),
+    }
+    return schedule, contract_idx, {}, None
+
+
+def _build_tiered_mg(contracts):
+    mg_amounts = contracts['mg_amount'].to_numpy(dtype=float)
+    streams, start_dates, contract_idx, period_idx, priced, error_msg = _price_contracts(contracts, [
+        (mg_amounts <= 0, "Minimum guarantee must be greater than zero."),
+    ])
+    if error_msg:
+        return None, None, None, error_msg
+
+    # Same cent-exact drawdown as the flat-rate MG: posted usage draws the MG down until breakeven.
+    usage = priced['Royalty_Expense'].to_numpy()
+    prepaid_applied, remaining = capped_drawdown(usage, mg_amounts, contract_idx)
+    overage = (usage.round(2) - prepaid_applied).round(2)
+    schedule = {
+        'Posting_Date': month_end_axis(start_dates, contract_idx, period_idx),
+        'Streams': streams,
+        'Effective_Rate': priced['Effective_Rate'].to_numpy().round(6),
+        'Usage_Expense': usage.round(2),
+        'Prepaid_Amortization': prepaid_applied,
+        'Overage_Expense': overage,
+        'Ending_Prepaid': remaining,
+        'Accrued_Overage': posted_cumsum(overage, contract_idx),
+    }
+    return schedule, contract_idx, {}, None
+
+
+RATE_CARD_INPUTS = [
+    ('tiers', "Rate Card Tiers (floor:rate)", 'tiers', [(0, 0.005), (1_000_000, 0.004), (5_000_000, 0.003)]),
+    ('basis', "Volume Basis", 'choice', 'period'),
+    ('method', "Pricing Method", 'choice', 'graduated'),
+    ('annual_escalator', "Annual Escalator (%)", 'percent', 0.0),
+]
+
+# Same journals as the flat-rate models; only the pricing of each period's streams differs.
+register_schedule_model(
+    'tiered-royalty', "Variable Royalty (Rate Card)", _build_tiered_royalty,
+    legs=SCHEDULE_MODELS['variable-royalty']['legs'],
+    inputs=RATE_CARD_INPUTS + [('start_date', "Start Date", 'date', '2020-12-01'),
+                               ('streams', "Monthly Streams", 'streams', [1000000, 1200000, 950000, 1100000])],
+    description="Usage royalties priced with a tiered, escalating rate card and accrued monthly.",
+    choices={'basis': BASES, 'method': METHODS},
+)
+register_schedule_model(
+    'tiered-mg', "Minimum Guarantee (Rate Card)", _build_tiered_mg,
+    legs=SCHEDULE_MODELS['mg-hybrid']['legs'],
+    inputs=[('mg_amount', "Minimum Guarantee ($)", 'money', 500_000.00)] + RATE_CARD_INPUTS + [
+        ('start_date', "Start Date", 'date', '2020-12-01'),
+        ('streams', "Monthly Streams", 'streams', [1000000, 1200000, 950000, 1100000])],
+    description="Prepaid MG drawn down by rate-card usage until breakeven, with overage accrued after.",
+    choices={'basis': BASES, 'method': METHODS},
+)
+
+
+def create_tiered_royalty_schedule(streams, tiers, start_date_str, basis='period', method='graduated', annual_escalator=0.0):
+    """Variable royalty schedule priced with a rate card (same layout as create_variable_royalty_schedule)."""
+    schedule_df, _, error_msg = build_schedule('tiered-royalty', {
+        'streams': streams, 'tiers': tiers, 'start_date': start_date_str,
+        'basis': basis, 'method': method, 'annual_escalator': annual_escalator,
+    })
+    return schedule_df, error_msg
+
+
+def create_tiered_mg_schedule(streams, tiers, mg_amount, start_date_str, basis='period', method='graduated', annual_escalator=0.0):
+    """MG hybrid schedule priced with a rate card (same layout as create_mg_hybrid_schedule)."""
+    schedule_df, _, error_msg = build_schedule('tiered-mg', {
+        'streams': streams, 'tiers': tiers, 'mg_amount': mg_amount, 'start_date': start_date_str,
+        'basis': basis, 'method': method, 'annual_escalator': annual_escalator,
+    })
+    return schedule_df, error_msg
@@ -0,0 +1,134 @@
+"""Content-addressed, memory-mapped on-disk cache of model results.
+
+A result is stored under the SHA-256 of its model name and contract terms, one ``.npy`` file per
+column plus a small manifest. Numeric columns are loaded back with ``mmap_mode='r'`` so unchanged
+contracts come off disk without a copy; editing any term changes the key and forces a recompute.
+Least-recently-used entries are evicted once the cache exceeds ``max_bytes``.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 5  # Bump when calculation logic changes so stale results are never served.
+RESULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "results")
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+MANIFEST = "manifest.json"
+
+
+def contract_key(model, params):
+    """Hashes the model name and its terms into a stable cache key."""
+    payload = json.dumps([CACHE_VERSION, model, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _column_array(series):
+    if series.dtype.kind in 'biuf':
+        return series.to_numpy()
+    return series.astype(str).to_numpy(dtype=str)
+
+
+class ResultCache:
+    """On-disk LRU of model results shared by the batch runner and the Streamlit session."""
+
+    def __init__(self, root=RESULT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._size = None  # Running total, measured on first write.
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        """Returns the cached result dict (frames backed by read-only memmaps), or None."""
+        manifest_path = os.path.join(self._path(key), MANIFEST)
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        result = {'meta': manifest['meta']}
+        try:
+            os.utime(manifest_path)  # Mark as recently used for eviction.
+            for frame_name, columns in manifest['frames'].items():
+                data = {
+                    col: np.load(os.path.join(self._path(key), f"{frame_name}__{i}.npy"), mmap_mode='r')
+                    for i, col in enumerate(columns)
+                }
+                result[frame_name] = pd.DataFrame(data, columns=columns, copy=False)
+        except FileNotFoundError:
+            return None  # Evicted by another process after the manifest was read.
+        return result
+
+    def put(self, key, result):
+        """Writes a result atomically (temp dir then rename) and evicts old entries if over budget."""
+        staging = tempfile.mkdtemp(dir=self.root, prefix='.staging-')
+        manifest = {'meta': result.get('meta', {}), 'frames': {}}
+        for frame_name, frame in result.items():
+            if frame_name == 'meta':
+                continue
+            manifest['frames'][frame_name] = list(frame.columns)
+            for i, col in enumerate(frame.columns):
+                np.save(os.path.join(staging, f"{frame_name}__{i}.npy"), _column_array(frame[col]))
+        with open(os.path.join(staging, MANIFEST), 'w') as f:
+            json.dump(manifest, f, default=str)
+
+        target = self._path(key)
+        try:
+            os.replace(staging, target)
+        except OSError:
+            # Another writer renamed the same result into place first; theirs is identical.
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += sum(entry.stat().st_size for entry in os.scandir(target))
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def get_or_compute(self, model, params, compute):
+        """Serves ``compute(model, params)`` from disk when the terms are unchanged; returns (result, error)."""
+        key = contract_key(model, params)
+        cached = self.get(key)
+        if cached is not None:
+            return cached, None
+        result, error_msg = compute(model, params)
+        if error_msg is None:
+            self.put(key, result)
+        return result, error_msg
+
+    def _entries(self):
+        """Yields (last used, size in bytes, path) for every complete entry."""
+        for name in os.listdir(self.root):
+            path = self._path(name)
+            manifest_path = os.path.join(path, MANIFEST)
+            if name.startswith('.') or not os.path.exists(manifest_path):
+                continue
+            yield os.path.getmtime(manifest_path), sum(entry.stat().st_size for entry in os.scandir(path)), path
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Drops least-recently-used entries until the cache fits in ``max_bytes``."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+        self._size = total
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+        self._size = 0
@@ -0,0 +1,116 @@
+"""Period-close rollforward of the prepaid (14001) and payable (22611) balances.
+
+Built straight from journal lines: each line is classified into a rollforward column, summed per
+contract and month, laid onto a complete contract x month grid, and balances come from a grouped
+cumulative sum. Opening balances for any date range therefore include all earlier activity
+without re-running the schedules.
+"""
+import numpy as np
+import pandas as pd
+
+from engine.validation import contract_keys
+
+PREPAID_ACCOUNT = 14001
+PAYABLE_ACCOUNT = 22611
+USAGE_ACCRUAL_JE_TYPES = ['ROYALTY', 'MG_OVERAGE']
+MOVEMENT_COLUMNS = ['Additions', 'Amortization', 'Invoiced', 'Overage_Accruals', 'Payments']
+ROLLFORWARD_COLUMNS = [
+    'Contract', 'Period',
+    'Opening_Prepaid', 'Additions', 'Amortization', 'Closing_Prepaid',
+    'Opening_Payable', 'Invoiced', 'Overage_Accruals', 'Payments', 'Closing_Payable',
+]
+
+
+def _classify(journal_df):
+    """Maps every journal line to (rollforward column, amount); unrelated lines map to None."""
+    account = journal_df['Account_Number'].to_numpy()
+    debit = journal_df['Debit'].to_numpy(dtype=float)
+    credit = journal_df['Credit'].to_numpy(dtype=float)
+    usage_accrual = journal_df['JE_Type'].isin(USAGE_ACCRUAL_JE_TYPES).to_numpy()
+    prepaid = account == PREPAID_ACCOUNT
+    payable = account == PAYABLE_ACCOUNT
+
+    conditions = [
+        prepaid & (debit > 0),
+        prepaid & (credit > 0),
+        payable & (credit > 0) & ~usage_accrual,
+        payable & (credit > 0) & usage_accrual,
+        payable & (debit > 0),
+    ]
+    column = np.select(conditions, MOVEMENT_COLUMNS, default=None)
+    amount = np.select(conditions, [debit, credit, credit, credit, debit], default=0.0)
+    return column, amount
+
+
+def create_rollforward(journal_df, start_date=None, end_date=None):
+    """Rollforward by contract and month for the periods between ``start_date`` and ``end_date`` (inclusive).
+
+    ``journal_df`` should hold every journal for the contracts (accruals and payments); portfolio
+    frames are keyed by Contract_ID, single deals by License. Overage_Accruals covers usage
+    royalties accrued to 22611 (MG overage and pure variable royalties); Invoiced covers vendor
+    invoices for upfront fees.
+    """
+    if journal_df.empty:
+        return pd.DataFrame(columns=ROLLFORWARD_COLUMNS)
+
+    column, amount = _classify(journal_df)
+    relevant = column != None  # noqa: E711 - elementwise comparison on an object array
+    movements = pd.DataFrame({
+        'Contract': contract_keys(journal_df).to_numpy()[relevant],
+        'Period': pd.PeriodIndex(pd.to_datetime(journal_df['Date'].to_numpy()[relevant]), freq='M'),
+        'Column': column[relevant],
+        'Amount': amount[relevant],
+    }).pivot_table(index=['Contract', 'Period'], columns='Column', values='Amount', aggfunc='sum', fill_value=0.0)
+    movements = movements.reindex(columns=MOVEMENT_COLUMNS, fill_value=0.0).rename_axis(columns=None)
+
+    first_period = movements.index.get_level_values('Period').min()
+    last_period = movements.index.get_level_values('Period').max()
+    if end_date is not None:
+        last_period = max(last_period, pd.Period(end_date, freq='M'))
+    grid = pd.MultiIndex.from_product(
+        [movements.index.get_level_values('Contract').unique(), pd.period_range(first_period, last_period, freq='M')],
+        names=['Contract', 'Period']
+    )
+    movements = movements.reindex(grid, fill_value=0.0)
+
+    prepaid_net = movements['Additions'] - movements['Amortization']
+    payable_net = movements['Invoiced'] + movements['Overage_Accruals'] - movements['Payments']
+    closing_prepaid = prepaid_net.groupby(level='Contract', sort=False).cumsum()
+    closing_payable = payable_net.groupby(level='Contract', sort=False).cumsum()
+
+    rollforward = movements.assign(
+        Opening_Prepaid=closing_prepaid - prepaid_net,
+        Closing_Prepaid=closing_prepaid,
+        Opening_Payable=closing_payable - payable_net,
+        Closing_Payable=closing_payable,
+    ).reset_index()
+
+    periods = rollforward['Period']
+    in_range = np.ones(len(rollforward), dtype=bool)
+    if start_date is not None:
+        in_range &= (periods >= pd.Period(start_date, freq='M')).to_numpy()
+    if end_date is not None:
+        in_range &= (periods <= pd.Period(end_date, freq='M')).to_numpy()
+    amounts = rollforward[ROLLFORWARD_COLUMNS[2:]]
+    active = (amounts.abs() > 0.005).any(axis=1).to_numpy()
+
+    rollforward = rollforward.loc[in_range & active, ROLLFORWARD_COLUMNS].reset_index(drop=True)
+    rollforward['Period'] = rollforward['Period'].astype(str)
+    rollforward[ROLLFORWARD_COLUMNS[2:]] = rollforward[ROLLFORWARD_COLUMNS[2:]].round(2)
+    return rollforward
+
+
+def rollforward_summary(rollforward_df):
+    """Portfolio totals for the range: opening and closing balances plus every movement."""
+    if rollforward_df.empty:
+        return pd.DataFrame(columns=['Metric', 'Value'])
+    by_contract = rollforward_df.groupby('Contract', sort=False)
+    totals = [
+        ("Opening Prepaid", by_contract['Opening_Prepaid'].first().sum()),
+        *[(col.replace('_', ' '), rollforward_df[col].sum()) for col in ['Additions', 'Amortization']],
+        ("Closing Prepaid", by_contract['Closing_Prepaid'].last().sum()),
+        ("Opening Payable", by_contract['Opening_Payable'].first().sum()),
+        *[(col.replace('_', ' '), rollforward_df[col].sum()) for col in ['Invoiced', 'Overage_Accruals', 'Payments']],
+        ("Closing Payable", by_contract['Closing_Payable'].last().sum()),
+    ]
+    return pd.DataFrame([(metric, f"${value:,.2f}") for metric, value in totals], columns=['Metric', 'Value'])
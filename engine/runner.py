@@ -0,0 +1,118 @@
+"""Model dispatch and the batch portfolio runner.
+
+Each model takes a plain params dict and returns ``{'meta': {...}, <frame name>: DataFrame, ...}``,
+the shape shared by the HTTP service, the on-disk result cache and the batch runner.
+"""
+from engine.calculations import (
+    LICENSE_NAME, create_amortization_schedule, generate_amortization_journals,
+    generate_quarterly_payment_journals, create_variable_royalty_schedule,
+    generate_variable_royalty_journals, create_mg_hybrid_schedule, generate_mg_hybrid_journals,
+)
+from engine.rate_cards import create_tiered_royalty_schedule, create_tiered_mg_schedule
+from engine.schedule_models import SCHEDULE_MODELS, run_schedule_model
+import engine.depreciation  # noqa: F401  Registers the 'depreciation' schedule model.
+
+
+def _rate_card_options(params):
+    """Rate-card settings for usage models priced with ``tiers`` instead of a flat ``rate``."""
+    return {
+        'basis': params.get('basis', 'period'),
+        'method': params.get('method', 'graduated'),
+        'annual_escalator': float(params.get('annual_escalator', 0.0)),
+    }
+
+
+def _amortization(params):
+    cost = float(params['cost'])
+    license_name = params.get('license_name', LICENSE_NAME)
+    rate, periods, schedule_df, error_msg = create_amortization_schedule(cost, params['start_date'], params['end_date'])
+    if error_msg:
+        return None, error_msg
+    return {
+        'meta': {'monthly_expense': rate, 'total_months': periods},
+        'schedule': schedule_df,
+        'journals': generate_amortization_journals(schedule_df, license_name, cost),
+        'payments': generate_quarterly_payment_journals(cost, params['start_date']),
+    }, None
+
+
+def _variable_royalty(params):
+    streams = [int(s) for s in params['streams']]
+    if 'tiers' in params:
+        schedule_df, error_msg = create_tiered_royalty_schedule(
+            streams, [tuple(t) for t in params['tiers']], params['start_date'], **_rate_card_options(params)
+        )
+    else:
+        schedule_df, error_msg = create_variable_royalty_schedule(streams, float(params['rate']), params['start_date'])
+    if error_msg:
+        return None, error_msg
+    return {
+        'meta': {},
+        'schedule': schedule_df,
+        'journals': generate_variable_royalty_journals(schedule_df, params.get('license_name', LICENSE_NAME)),
+    }, None
+
+
+def _mg_hybrid(params):
+    mg_amount = float(params['mg_amount'])
+    streams = [int(s) for s in params['streams']]
+    if 'tiers' in params:
+        schedule_df, error_msg = create_tiered_mg_schedule(
+            streams, [tuple(t) for t in params['tiers']], mg_amount, params['start_date'], **_rate_card_options(params)
+        )
+    else:
+        schedule_df, error_msg = create_mg_hybrid_schedule(streams, float(params['rate']), mg_amount, params['start_date'])
+    if error_msg:
+        return None, error_msg
+    return {
+        'meta': {},
+        'schedule': schedule_df,
+        'journals': generate_mg_hybrid_journals(
+            schedule_df, params.get('license_name', LICENSE_NAME), mg_amount, params['start_date']
+        ),
+    }, None
+
+
+def _registered_model(model):
+    """Runner for a schedule model that only exists in the registry (no tiers or payment extras)."""
+    def run(params):
+        terms = {term: params[term] for term, _, _, _ in SCHEDULE_MODELS[model]['inputs'] if term in params}
+        return run_schedule_model(model, terms, params.get('license_name', LICENSE_NAME))
+    return run
+
+
+MODELS = {
+    'amortization': _amortization,
+    'variable-royalty': _variable_royalty,
+    'mg-hybrid': _mg_hybrid,
+}
+MODELS.update({name: _registered_model(name) for name in SCHEDULE_MODELS if name not in MODELS})
+
+
+def run_model(model, params):
+    """Runs one engine model; returns (result dict of meta + frames, error message)."""
+    if model not in MODELS:
+        return None, f"Unknown model '{model}'. Expected one of: {', '.join(MODELS)}."
+    try:
+        return MODELS[model](params)
+    except (KeyError, TypeError, ValueError) as exc:
+        return None, f"Invalid parameters for '{model}': {exc}"
+
+
+def run_portfolio(contracts, cache=None):
+    """Runs every contract (``{'contract_id', 'model', 'params'}``) and returns (results, errors) keyed by contract_id.
+
+    With a ``ResultCache``, unchanged contracts are loaded from disk and only new or edited terms are recomputed.
+    """
+    results, errors = {}, {}
+    for contract in contracts:
+        model, params = contract['model'], contract['params']
+        if cache is not None:
+            result, error_msg = cache.get_or_compute(model, params, run_model)
+        else:
+            result, error_msg = run_model(model, params)
+        if error_msg:
+            errors[contract['contract_id']] = error_msg
+        else:
+            results[contract['contract_id']] = result
+    return results, errors
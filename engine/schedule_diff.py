@@ -0,0 +1,144 @@
+"""Snapshot/diff of two schedule or journal runs.
+
+Both runs are keyed by contract, posting date and account and matched with a hash join
+(``DataFrame.merge``). Only moved lines come back, plus delta journals that post the
+difference. Large inputs are split into hash partitions on the contract key. Each partition is
+joined on its own, so peak memory tracks one partition, not the whole run.
+"""
+import numpy as np
+import pandas as pd
+
+from engine.validation import contract_keys
+
+TOLERANCE = 0.005
+ROWS_PER_PARTITION = 250_000
+JOURNAL_KEYS = ['Contract', 'Date', 'JE_Type', 'Account_Number']
+JOURNAL_DIFF_COLUMNS = JOURNAL_KEYS + ['Account_Description', 'Change_Type', 'Net_Before', 'Net_After', 'Delta']
+SCHEDULE_DIFF_COLUMNS = ['Contract', 'Posting_Date', 'Column', 'Change_Type', 'Before', 'After', 'Delta']
+
+
+def _partition_ids(df, partitions):
+    if partitions == 1:
+        return np.zeros(len(df), dtype=np.int64)
+    hashes = pd.util.hash_array(contract_keys(df).astype(str).to_numpy())
+    return (hashes % np.uint64(partitions)).astype(np.int64)
+
+
+def _partitioned(before, after, partitions, diff_part):
+    """Runs ``diff_part`` on matching hash partitions of both runs and stacks the results."""
+    if partitions is None:
+        partitions = max(1, (len(before) + len(after)) // ROWS_PER_PARTITION)
+    before_parts = _split(before, _partition_ids(before, partitions), partitions)
+    after_parts = _split(after, _partition_ids(after, partitions), partitions)
+    return pd.concat([diff_part(b, a) for b, a in zip(before_parts, after_parts)], ignore_index=True)
+
+
+def _split(df, ids, partitions):
+    """Yields the partitions one at a time (one sort instead of a mask per partition).
+
+    Only the partition being joined is copied out, so peak memory stays near one partition.
+    """
+    if partitions == 1:
+        yield df
+        return
+    order = np.argsort(ids, kind='stable')
+    bounds = np.searchsorted(ids[order], np.arange(1, partitions))
+    for rows in np.split(order, bounds):
+        yield df.iloc[rows]
+
+
+def _change_type(indicator, delta, tolerance):
+    change = np.where(indicator == 'left_only', 'REMOVED', np.where(indicator == 'right_only', 'ADDED', 'CHANGED'))
+    return change, (indicator != 'both') | (np.abs(delta) > tolerance)
+
+
+def _journal_net(journal_df):
+    """Nets each contract/date/JE_Type/account to one signed amount (debit positive)."""
+    return pd.DataFrame({
+        'Contract': contract_keys(journal_df).to_numpy(),
+        'Date': journal_df['Date'].to_numpy(),
+        'JE_Type': journal_df['JE_Type'].to_numpy(),
+        'Account_Number': journal_df['Account_Number'].to_numpy(),
+        'Account_Description': journal_df['Account_Description'].to_numpy(),
+        'Net': journal_df['Debit'].to_numpy(dtype=float) - journal_df['Credit'].to_numpy(dtype=float),
+    }).groupby(JOURNAL_KEYS, sort=False, as_index=False).agg(
+        Account_Description=('Account_Description', 'first'), Net=('Net', 'sum')
+    )
+
+
+def diff_journals(before_df, after_df, tolerance=TOLERANCE, partitions=None):
+    """Journal lines whose net amount moved between two runs (ADDED, REMOVED or CHANGED)."""
+    def diff_part(before, after):
+        merged = _journal_net(before).merge(
+            _journal_net(after), on=JOURNAL_KEYS, how='outer', suffixes=('_Before', '_After'), indicator=True
+        )
+        net_before = merged['Net_Before'].fillna(0.0).to_numpy()
+        net_after = merged['Net_After'].fillna(0.0).to_numpy()
+        delta = net_after - net_before
+        change, moved = _change_type(merged['_merge'].astype(str).to_numpy(), delta, tolerance)
+        merged = merged.assign(
+            Account_Description=merged['Account_Description_After'].fillna(merged['Account_Description_Before']),
+            Change_Type=change, Net_Before=net_before.round(2), Net_After=net_after.round(2), Delta=delta.round(2),
+        )
+        return merged.loc[moved, JOURNAL_DIFF_COLUMNS]
+
+    if before_df.empty and after_df.empty:
+        return pd.DataFrame(columns=JOURNAL_DIFF_COLUMNS)
+    return _partitioned(before_df, after_df, partitions, diff_part)
+
+
+def delta_journals(journal_diff_df):
+    """Adjusting entries that move the old run to the new one; they balance whenever both runs did."""
+    delta = journal_diff_df['Delta'].to_numpy(dtype=float)
+    return pd.DataFrame({
+        'Date': journal_diff_df['Date'].to_numpy(),
+        'JE_Type': 'ADJ_' + journal_diff_df['JE_Type'].astype(str),
+        'License': journal_diff_df['Contract'].to_numpy(),
+        'Account_Description': journal_diff_df['Account_Description'].to_numpy(),
+        'Account_Number': journal_diff_df['Account_Number'].to_numpy(),
+        'Debit': np.maximum(delta, 0.0),
+        'Credit': np.maximum(-delta, 0.0),
+    })
+
+
+def diff_schedules(before_df, after_df, tolerance=TOLERANCE, partitions=None):
+    """Schedule cells that moved, in long form (one row per contract, posting date and column)."""
+    value_columns = [
+        col for col in after_df.columns
+        if col in before_df.columns and col not in ('Posting_Date', 'Contract_ID')
+        and pd.api.types.is_numeric_dtype(after_df[col]) and pd.api.types.is_numeric_dtype(before_df[col])
+    ]
+
+    def keyed(df):
+        return pd.DataFrame({
+            'Contract': contract_keys(df).to_numpy(),
+            'Posting_Date': df['Posting_Date'].to_numpy(),
+            **{col: df[col].to_numpy(dtype=float) for col in value_columns},
+        })
+
+    def diff_part(before, after):
+        merged = keyed(before).merge(
+            keyed(after), on=['Contract', 'Posting_Date'], how='outer', suffixes=('_Before', '_After'), indicator=True
+        )
+        indicator = merged['_merge'].astype(str).to_numpy()
+        changes = []
+        for col in value_columns:
+            old = merged[f'{col}_Before'].fillna(0.0).to_numpy()
+            new = merged[f'{col}_After'].fillna(0.0).to_numpy()
+            change, moved = _change_type(indicator, new - old, tolerance)
+            changes.append(pd.DataFrame({
+                'Contract': merged['Contract'].to_numpy()[moved],
+                'Posting_Date': merged['Posting_Date'].to_numpy()[moved],
+                'Column': col,
+                'Change_Type': change[moved],
+                'Before': old[moved].round(2),
+                'After': new[moved].round(2),
+                'Delta': (new - old)[moved].round(2),
+            }, columns=SCHEDULE_DIFF_COLUMNS))
+        return pd.concat(changes, ignore_index=True) if changes else pd.DataFrame(columns=SCHEDULE_DIFF_COLUMNS)
+
+    if (before_df.empty and after_df.empty) or not value_columns:
+        return pd.DataFrame(columns=SCHEDULE_DIFF_COLUMNS)
+    return _partitioned(before_df, after_df, partitions, diff_part).sort_values(
+        ['Contract', 'Posting_Date'], kind='mergesort'
+    ).reset_index(drop=True)
@@ -0,0 +1,457 @@
+"""Registry of schedule models built on one vectorized core.
+
+A model is registered with:
+
+* a schedule builder, which turns a frame of contract terms (one row per contract) into the
+  period rows for every contract at once. It uses the shared core: the month-end date axis,
+  straight-line allocation with a final-month true-up, per-contract balance cumsums and capped
+  drawdowns;
+* journal leg templates, which ``build_journals`` expands into debit/credit pairs for every
+  period of every contract;
+* an input spec, so the Streamlit page can render a form for any registered model.
+
+A single deal is a portfolio of one, so a new model gets batch performance without writing a
+loop. The fixed-fee, variable-royalty and MG calculations in ``engine.calculations`` run here.
+"""
+import numpy as np
+import pandas as pd
+
+from engine.journals import (
+    journal_legs, PREPAID, PREPAID_MG, CONTENT_EXPENSE, AP_VENDOR, AP_ROYALTY, CASH,
+)
+
+PREPAID_INSURANCE = ('Prepaid Insurance', 14002)
+INSURANCE_EXPENSE = ('Insurance Expense', 60011)
+RENT_EXPENSE = ('Rent Expense', 60021)
+DEFERRED_RENT = ('Deferred Rent Liability', 24011)
+CAPITALIZED_SOFTWARE = ('Capitalized Software', 17001)
+ACCUMULATED_SOFTWARE_AMORTIZATION = ('Accumulated Amortization - Software', 17901)
+SOFTWARE_AMORTIZATION = ('Software Amortization Expense', 60031)
+
+SCHEDULE_MODELS = {}
+
+
+# ==============================================================================
+# VECTORIZED CORE
+# ==============================================================================
+
+def parse_dates(values):
+    """Day-resolution dates; unparseable values become NaT."""
+    return pd.to_datetime(pd.Series(values), errors='coerce').to_numpy().astype('datetime64[D]')
+
+
+def term_months(start_dates, end_dates):
+    """Inclusive month count per contract, identical to relativedelta(end, start) years*12 + months + 1."""
+    start_month = start_dates.astype('datetime64[M]')
+    end_month = end_dates.astype('datetime64[M]')
+    start_day = (start_dates - start_month.astype('datetime64[D]')).astype(np.int64) + 1
+    end_day = (end_dates - end_month.astype('datetime64[D]')).astype(np.int64) + 1
+    days_in_end_month = ((end_month + 1).astype('datetime64[D]') - end_month.astype('datetime64[D]')).astype(np.int64)
+    # relativedelta clamps the start day to the end month's length, then steps the month count back
+    # toward zero when that overshoots the end date (in either direction).
+    start_day = np.minimum(start_day, days_in_end_month)
+    overshoot = np.where(end_dates >= start_dates, -(start_day > end_day).astype(np.int64), start_day < end_day)
+    return (end_month - start_month).astype(np.int64) + overshoot + 1
+
+
+def expand_periods(periods):
+    """Flattens per-contract period counts into (contract index, period index) per schedule row."""
+    periods = np.asarray(periods, dtype=np.int64)
+    contract_idx = np.repeat(np.arange(len(periods)), periods)
+    first_row = np.cumsum(periods) - periods
+    return contract_idx, np.arange(periods.sum()) - first_row[contract_idx]
+
+
+def month_end_axis(start_dates, contract_idx, period_idx):
+    """Month-end posting date ('YYYY-MM-DD') of period ``period_idx`` for each row's contract."""
+    months = start_dates.astype('datetime64[M]')[contract_idx] + period_idx
+    # Format each distinct month once; a large portfolio only spans a few hundred of them.
+    unique_months, inverse = np.unique(months, return_inverse=True)
+    return np.datetime_as_string((unique_months + 1).astype('datetime64[D]') - 1, unit='D').astype(object)[inverse]
+
+
+def grouped_cumsum(values, contract_idx):
+    """Running total within each contract (sequential per contract, so it matches a row loop)."""
+    return pd.Series(values).groupby(contract_idx, sort=False).cumsum().to_numpy()
+
+
+def posted_cumsum(amounts, contract_idx):
+    """Running total of posted (cent) amounts, rounded so float residue never shows up as a cent."""
+    return grouped_cumsum(amounts, contract_idx).round(2)
+
+
+def straight_line(totals, periods, contract_idx, period_idx):
+    """Equal monthly amounts in cents, the final month trued up so the posted amounts sum exactly to the total."""
+    amounts = (totals / periods).round(2)[contract_idx]
+    final = period_idx == periods[contract_idx] - 1
+    amounts[final] = 0.0
+    amounts[final] = (totals.round(2)[contract_idx[final]] - posted_cumsum(amounts, contract_idx)[final]).round(2)
+    return amounts
+
+
+def capped_drawdown(usage, caps, contract_idx):
+    """Portion of each period's posted usage absorbed by a per-contract cap (e.g. an MG), and the cap left.
+
+    Works in cents: usage is rounded as it is posted, so the drawdowns sum exactly to the cap once
+    it is used up, and drawdown plus overage is always the period's posted usage.
+    """
+    usage, caps = usage.round(2), caps.round(2)[contract_idx]
+    drawn = np.minimum(posted_cumsum(usage, contract_idx), caps)
+    first = np.r_[True, contract_idx[1:] != contract_idx[:-1]]
+    previous = np.where(first, 0.0, np.r_[0.0, drawn[:-1]])
+    return (drawn - previous).round(2), (caps - drawn).round(2)
+
+
+def first_error(contract_ids, checks):
+    """Message for the first failing check, prefixed with the contract ID for portfolios."""
+    for mask, message in checks:
+        mask = np.asarray(mask)
+        if mask.any():
+            if len(contract_ids) > 1:
+                return f"{contract_ids[np.flatnonzero(mask)[0]]}: {message}"
+            return message
+    return None
+
+
+def stream_periods(contracts):
+    """Flattens the per-contract ``streams`` lists; returns (streams, per-contract period counts)."""
+    stream_lists = [list(s) for s in contracts['streams']]
+    periods = np.array([len(s) for s in stream_lists], dtype=np.int64)
+    streams = np.concatenate([np.asarray(s, dtype=np.int64) for s in stream_lists]) if periods.sum() else np.zeros(0, dtype=np.int64)
+    return streams, periods
+
+
+# ==============================================================================
+# SCHEDULE BUILDERS (terms frame -> schedule columns, contract index, meta, error)
+# ==============================================================================
+
+def _straight_line_builder(total_col, start_col, end_col, columns):
+    """Builder for any upfront amount recognized straight-line between two dates."""
+    expense_col, accumulated_col, balance_col = columns
+
+    def build(contracts):
+        start_dates = parse_dates(contracts[start_col])
+        end_dates = parse_dates(contracts[end_col])
+        totals = contracts[total_col].to_numpy(dtype=float)
+        invalid_date = np.isnat(start_dates) | np.isnat(end_dates)
+        periods = np.where(invalid_date, 0, term_months(start_dates, end_dates))
+        error_msg = first_error(contracts['contract_id'].to_numpy(), [
+            (invalid_date, "Invalid Date Format. Use YYYY-MM-DD."),
+            ((periods <= 0) | (end_dates < start_dates), "End date must be after start date."),
+        ])
+        if error_msg:
+            return None, None, None, error_msg
+
+        contract_idx, period_idx = expand_periods(periods)
+        expense = straight_line(totals, periods, contract_idx, period_idx)
+        accumulated = posted_cumsum(expense, contract_idx)
+        schedule = {
+            'Posting_Date': month_end_axis(start_dates, contract_idx, period_idx),
+            expense_col: expense,
+            accumulated_col: accumulated,
+            balance_col: (totals[contract_idx] - accumulated).round(2),
+        }
+        meta = {'monthly_expense': totals / periods, 'total_months': periods}
+        return schedule, contract_idx, meta, None
+
+    return build
+
+
+def usage_checks(contracts, streams_periods, start_dates):
+    """Checks shared by the usage models: at least one stream period and a valid start date."""
+    return [
+        (streams_periods == 0, "Enter at least one monthly stream value."),
+        (np.isnat(start_dates), "Invalid Date Format. Use YYYY-MM-DD."),
+    ]
+
+
+def _build_variable_royalty(contracts):
+    streams, periods = stream_periods(contracts)
+    start_dates = parse_dates(contracts['start_date'])
+    error_msg = first_error(contracts['contract_id'].to_numpy(), usage_checks(contracts, periods, start_dates))
+    if error_msg:
+        return None, None, None, error_msg
+
+    contract_idx, period_idx = expand_periods(periods)
+    expense = streams * contracts['rate'].to_numpy(dtype=float)[contract_idx]
+    schedule = {
+        'Posting_Date': month_end_axis(start_dates, contract_idx, period_idx),
+        'Streams': streams,
+        'Royalty_Expense': expense.round(2),
+        'Accrued_Payable': posted_cumsum(expense.round(2), contract_idx),
+    }
+    return schedule, contract_idx, {}, None
+
+
+def _build_mg_hybrid(contracts):
+    streams, periods = stream_periods(contracts)
+    start_dates = parse_dates(contracts['start_date'])
+    mg_amounts = contracts['mg_amount'].to_numpy(dtype=float)
+    error_msg = first_error(contracts['contract_id'].to_numpy(), usage_checks(contracts, periods, start_dates) + [
+        (mg_amounts <= 0, "Minimum guarantee must be greater than zero."),
+    ])
+    if error_msg:
+        return None, None, None, error_msg
+
+    contract_idx, period_idx = expand_periods(periods)
+    usage = streams * contracts['rate'].to_numpy(dtype=float)[contract_idx]
+    prepaid_applied, remaining = capped_drawdown(usage, mg_amounts, contract_idx)
+    overage = (usage.round(2) - prepaid_applied).round(2)
+    schedule = {
+        'Posting_Date': month_end_axis(start_dates, contract_idx, period_idx),
+        'Streams': streams,
+        'Usage_Expense': usage.round(2),
+        'Prepaid_Amortization': prepaid_applied,
+        'Overage_Expense': overage,
+        'Ending_Prepaid': remaining,
+        'Accrued_Overage': posted_cumsum(overage, contract_idx),
+    }
+    return schedule, contract_idx, {}, None
+
+
+def _build_deferred_rent(contracts):
+    start_dates = parse_dates(contracts['start_date'])
+    periods = contracts['term_months'].to_numpy(dtype=np.int64)
+    error_msg = first_error(contracts['contract_id'].to_numpy(), [
+        (np.isnat(start_dates), "Invalid Date Format. Use YYYY-MM-DD."),
+        (periods <= 0, "Lease term must be at least one month."),
+    ])
+    if error_msg:
+        return None, None, None, error_msg
+
+    contract_idx, period_idx = expand_periods(periods)
+    escalation = (1 + contracts['annual_escalator'].to_numpy(dtype=float)[contract_idx]) ** (period_idx // 12)
+    cash_rent = (contracts['monthly_rent'].to_numpy(dtype=float)[contract_idx] * escalation).round(2)
+    total_rent = np.bincount(contract_idx, weights=cash_rent, minlength=len(periods)).round(2)
+    expense = straight_line(total_rent, periods, contract_idx, period_idx)
+    deferred_change = (expense - cash_rent).round(2)
+    schedule = {
+        'Posting_Date': month_end_axis(start_dates, contract_idx, period_idx),
+        'Cash_Rent': cash_rent,
+        'Straight_Line_Expense': expense,
+        'Deferred_Rent_Change': deferred_change,
+        'Deferred_Rent_Balance': posted_cumsum(deferred_change, contract_idx),
+    }
+    return schedule, contract_idx, {'total_rent': total_rent}, None
+
+
+def _build_software_capitalization(contracts):
+    start_dates = parse_dates(contracts['in_service_date'])
+    periods = contracts['useful_life_months'].to_numpy(dtype=np.int64)
+    costs = contracts['capitalized_cost'].to_numpy(dtype=float)
+    error_msg = first_error(contracts['contract_id'].to_numpy(), [
+        (np.isnat(start_dates), "Invalid Date Format. Use YYYY-MM-DD."),
+        (periods <= 0, "Useful life must be at least one month."),
+    ])
+    if error_msg:
+        return None, None, None, error_msg
+
+    contract_idx, period_idx = expand_periods(periods)
+    expense = straight_line(costs, periods, contract_idx, period_idx)
+    accumulated = posted_cumsum(expense, contract_idx)
+    schedule = {
+        'Posting_Date': month_end_axis(start_dates, contract_idx, period_idx),
+        'Amortization_Expense': expense,
+        'Accumulated_Amortization': accumulated,
+        'Net_Book_Value': (costs[contract_idx] - accumulated).round(2),
+    }
+    return schedule, contract_idx, {'monthly_expense': costs / periods}, None
+
+
+# ==============================================================================
+# REGISTRY
+# ==============================================================================
+
+def register_schedule_model(name, label, build, legs, inputs, description="", choices=None):
+    """Adds a model to the registry.
+
+    ``legs`` are journal templates: dicts with ``je_type``, ``amount`` (a schedule column, or a
+    term such as ``'cost'`` for one entry per contract), ``date`` (``'posting'``, ``'first'`` for
+    the first posting date, or ``'start'`` for the start term), ``debit``/``credit`` account pairs
+    and an optional ``skip_zero``; build them with ``leg_template``. ``inputs`` are (term, label,
+    kind, default) tuples; kind is one of money, rate, percent, date, months, streams, tiers or choice (a
+    named option such as a depreciation method, picked from ``choices[term]``).
+    """
+    SCHEDULE_MODELS[name] = {
+        'label': label, 'build': build, 'legs': legs, 'inputs': inputs, 'description': description,
+        'choices': choices or {},
+    }
+
+
+def leg_template(je_type, amount, debit, credit, date='posting', skip_zero=False):
+    """Journal template for ``register_schedule_model``'s ``legs`` (see its docstring for the fields)."""
+    return {'je_type': je_type, 'amount': amount, 'date': date, 'debit': debit, 'credit': credit, 'skip_zero': skip_zero}
+
+
+register_schedule_model(
+    'amortization', "Fixed Fee (Straight-Line)",
+    _straight_line_builder('cost', 'start_date', 'end_date',
+                           ('Amortization_Expense', 'Accumulated_Amortization', 'Net_Book_Value_NBV')),
+    legs=[
+        leg_template('PREPAID', 'cost', PREPAID, AP_VENDOR, date='first'),
+        leg_template('EXPENSE', 'Amortization_Expense', CONTENT_EXPENSE, PREPAID),
+    ],
+    inputs=[('cost', "Total License Cost ($)", 'money', 200_000_000.00),
+            ('start_date', "Start Date", 'date', '2020-12-01'),
+            ('end_date', "End Date", 'date', '2023-12-31')],
+    description="Upfront license fee held as a prepaid and expensed evenly over the access period.",
+)
+register_schedule_model(
+    'variable-royalty', "Variable Royalty (Pure Usage)", _build_variable_royalty,
+    legs=[leg_template('ROYALTY', 'Royalty_Expense', CONTENT_EXPENSE, AP_ROYALTY)],
+    inputs=[('rate', "Royalty Rate ($ per stream)", 'rate', 0.005),
+            ('start_date', "Start Date", 'date', '2020-12-01'),
+            ('streams', "Monthly Streams", 'streams', [1000000, 1200000, 950000, 1100000])],
+    description="Usage royalties accrued monthly as stream volume is reported.",
+)
+register_schedule_model(
+    'mg-hybrid', "Minimum Guarantee (Hybrid/Usage)", _build_mg_hybrid,
+    legs=[
+        leg_template('MG_PREPAY', 'mg_amount', PREPAID_MG, CASH, date='start'),
+        leg_template('MG_USAGE', 'Prepaid_Amortization', CONTENT_EXPENSE, PREPAID_MG, skip_zero=True),
+        leg_template('MG_OVERAGE', 'Overage_Expense', CONTENT_EXPENSE, AP_ROYALTY, skip_zero=True),
+    ],
+    inputs=[('mg_amount', "Minimum Guarantee ($)", 'money', 500_000.00),
+            ('rate', "Royalty Rate ($ per stream)", 'rate', 0.005),
+            ('start_date', "Start Date", 'date', '2020-12-01'),
+            ('streams', "Monthly Streams", 'streams', [1000000, 1200000, 950000, 1100000])],
+    description="Prepaid MG drawn down by usage until breakeven, with overage accrued after.",
+)
+register_schedule_model(
+    'prepaid-insurance', "Prepaid Insurance",
+    _straight_line_builder('premium', 'start_date', 'end_date',
+                           ('Insurance_Expense', 'Accumulated_Expense', 'Prepaid_Balance')),
+    legs=[
+        leg_template('PREPAID', 'premium', PREPAID_INSURANCE, CASH, date='first'),
+        leg_template('EXPENSE', 'Insurance_Expense', INSURANCE_EXPENSE, PREPAID_INSURANCE),
+    ],
+    inputs=[('premium', "Policy Premium ($)", 'money', 120_000.00),
+            ('start_date', "Policy Start", 'date', '2024-01-01'),
+            ('end_date', "Policy End", 'date', '2024-12-31')],
+    description="Annual premium paid upfront and expensed evenly over the coverage period.",
+)
+register_schedule_model(
+    'deferred-rent', "Deferred Rent (Straight-Line Lease Cost)", _build_deferred_rent,
+    legs=[
+        leg_template('RENT', 'Straight_Line_Expense', RENT_EXPENSE, DEFERRED_RENT),
+        leg_template('RENT_PAYMENT', 'Cash_Rent', DEFERRED_RENT, CASH),
+    ],
+    inputs=[('monthly_rent', "Starting Monthly Rent ($)", 'money', 25_000.00),
+            ('annual_escalator', "Annual Escalator (%)", 'percent', 0.03),
+            ('start_date', "Lease Start", 'date', '2024-01-01'),
+            ('term_months', "Lease Term (Months)", 'months', 60)],
+    description="Escalating cash rent recognized as level expense; the difference builds a deferred rent liability.",
+)
+register_schedule_model(
+    'software-capitalization', "Capitalized Software", _build_software_capitalization,
+    legs=[
+        leg_template('CAPITALIZE', 'capitalized_cost', CAPITALIZED_SOFTWARE, AP_VENDOR, date='first'),
+        leg_template('AMORTIZATION', 'Amortization_Expense', SOFTWARE_AMORTIZATION, ACCUMULATED_SOFTWARE_AMORTIZATION),
+    ],
+    inputs=[('capitalized_cost', "Capitalized Development Cost ($)", 'money', 900_000.00),
+            ('in_service_date', "In-Service Date", 'date', '2024-01-01'),
+            ('useful_life_months', "Useful Life (Months)", 'months', 36)],
+    description="Development costs capitalized after feasibility and amortized over the useful life.",
+)
+
+
+# ==============================================================================
+# ENTRY POINTS
+# ==============================================================================
+
+def _terms_frame(terms):
+    """Accepts one contract's terms (dict) or a portfolio (DataFrame) and adds contract_id."""
+    if isinstance(terms, dict):
+        frame = pd.DataFrame([terms])
+    else:
+        frame = terms.reset_index(drop=True)
+    if 'contract_id' not in frame.columns:
+        frame = frame.assign(contract_id=np.arange(len(frame)))
+    return frame
+
+
+def build_schedule(model, terms):
+    """Builds the schedule for one contract (dict) or a portfolio (DataFrame with ``contract_id``).
+
+    Returns (schedule_df, meta, error message). Portfolio schedules carry a Contract_ID column;
+    meta values are per-contract arrays (plain Python scalars for a single contract, so they
+    serialize to JSON and round-trip through the result cache unchanged).
+    """
+    contracts = _terms_frame(terms)
+    schedule, contract_idx, meta, error_msg = SCHEDULE_MODELS[model]['build'](contracts)
+    if error_msg:
+        return pd.DataFrame(), {}, error_msg
+
+    schedule_df = pd.DataFrame(schedule)
+    if isinstance(terms, dict):
+        meta = {key: np.asarray(value)[0].item() for key, value in meta.items()}
+    else:
+        schedule_df.insert(0, 'Contract_ID', contracts['contract_id'].to_numpy()[contract_idx])
+    return schedule_df, meta, None
+
+
+def build_journals(model, schedule_df, terms, license_name, legs=None):
+    """Expands the model's leg templates over a schedule built by ``build_schedule``.
+
+    ``terms`` are the same dict/DataFrame passed to ``build_schedule``. A ``license_name`` term
+    column, when present, overrides ``license_name`` per contract. ``legs`` replaces the model's
+    own templates (e.g. the licensor mirror of a deal). Lines come out grouped by contract in the
+    order the row-by-row generators used.
+    """
+    if schedule_df.empty:
+        return pd.DataFrame()
+
+    contracts = _terms_frame(terms)
+    if 'Contract_ID' in schedule_df.columns:
+        contract_idx = pd.Index(contracts['contract_id']).get_indexer(schedule_df['Contract_ID'])
+    else:
+        contract_idx = np.zeros(len(schedule_df), dtype=np.int64)
+    licenses = (contracts['license_name'].fillna(license_name) if 'license_name' in contracts.columns
+                else pd.Series(license_name, index=contracts.index)).to_numpy(dtype=object)
+
+    first = np.r_[True, contract_idx[1:] != contract_idx[:-1]]
+    period_idx = np.arange(len(contract_idx)) - np.flatnonzero(first)[np.cumsum(first) - 1]
+    posting_dates = schedule_df['Posting_Date'].to_numpy()
+    legs = SCHEDULE_MODELS[model]['legs'] if legs is None else legs
+    # Sort key: contract, then contract-level entries before period entries, then template order.
+    stride = (period_idx.max() + 2) * len(legs)
+
+    blocks, keys = [], []
+    for position, leg in enumerate(legs):
+        if leg['date'] == 'posting':
+            amounts = schedule_df[leg['amount']].to_numpy(dtype=float)
+            order = contract_idx * stride + (period_idx + 1) * len(legs) + position
+            dates, owners = posting_dates, contract_idx
+        else:
+            owners = contract_idx[first]
+            amounts = contracts[leg['amount']].to_numpy(dtype=float)[owners]
+            order = owners * stride + position
+            if leg['date'] == 'first':
+                dates = posting_dates[first]
+            else:
+                dates = pd.to_datetime(contracts[leg['date'] + '_date']).dt.strftime('%Y-%m-%d').to_numpy()[owners]
+        frame, key = journal_legs(
+            dates, amounts, leg['je_type'], licenses[owners], leg['debit'], leg['credit'],
+            order=order, skip_zero=leg['skip_zero']
+        )
+        blocks.append(frame)
+        keys.append(key)
+
+    keys = np.concatenate(keys)
+    order = np.argsort(keys, kind='stable')
+    journal_df = pd.concat(blocks, ignore_index=True).iloc[order].reset_index(drop=True)
+    if 'Contract_ID' in schedule_df.columns:
+        journal_df.insert(0, 'Contract_ID', contracts['contract_id'].to_numpy()[(keys[order] // stride).astype(np.int64)])
+    return journal_df
+
+
+def run_schedule_model(model, terms, license_name):
+    """Schedule and journals for a registered model; returns (result dict, error message)."""
+    schedule_df, meta, error_msg = build_schedule(model, terms)
+    if error_msg:
+        return None, error_msg
+    return {
+        'meta': meta,
+        'schedule': schedule_df,
+        'journals': build_journals(model, schedule_df, terms, license_name),
+    }, None
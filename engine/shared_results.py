@@ -0,0 +1,162 @@
+"""In-process result store shared by every session of one server.
+
+Sessions asking for the same model and terms share one stored result, so a scenario is computed
+(or loaded from the on-disk ``ResultCache``) once per server rather than once per session. Each
+caller gets shallow frame views over the shared column data: with pandas copy-on-write (always on
+from pandas 3), a session that edits its view gets a private copy and never changes what other
+sessions see, and arrays from ``to_numpy()`` are read-only. Without copy-on-write each caller gets
+a deep copy instead, so sharing never depends on the installed pandas.
+
+Each session holds at most one reference per ``slot`` (e.g. the fixed-fee pathway), so
+recalculating replaces that session's previous result. Unreferenced results are dropped
+least-recently-used first once the store exceeds ``max_bytes``. A session's references are
+released when its ``session_handle`` is garbage collected (keep it in the session state), and
+otherwise expire after ``session_ttl`` seconds. Pinned results (e.g. pre-warmed defaults) are
+never evicted.
+"""
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+from engine.result_cache import contract_key
+
+MAX_SHARED_BYTES = 256 * 1024 * 1024
+SESSION_TTL_SECONDS = 60 * 60
+
+
+def _copy_on_write():
+    """True when an edit to a shallow copy can never reach the frame it was copied from."""
+    return int(pd.__version__.split('.')[0]) >= 3 or pd.get_option('mode.copy_on_write') is True
+
+
+def _view(result):
+    """Per-caller result dict whose frames share the stored data when copy-on-write makes that safe."""
+    deep = not _copy_on_write()
+    return {name: value if name == 'meta' else value.copy(deep=deep) for name, value in result.items()}
+
+
+class _SessionHandle:
+    """Lives in one session's state; collecting it releases that session's references."""
+
+
+def result_nbytes(result):
+    """Approximate in-memory size of a result dict's frames."""
+    return int(sum(frame.memory_usage(index=True, deep=True).sum() for name, frame in result.items() if name != 'meta'))
+
+
+class SharedResultStore:
+    """Thread-safe, reference-counted map of contract key -> result shared across sessions."""
+
+    def __init__(self, backing=None, max_bytes=MAX_SHARED_BYTES, session_ttl=SESSION_TTL_SECONDS):
+        self.backing = backing  # Optional ResultCache consulted before computing.
+        self.max_bytes = max_bytes
+        self.session_ttl = session_ttl
+        self._entries = OrderedDict()  # key -> (result, size in bytes), least recently used first.
+        self._holders = {}  # (session id, slot) -> (key, last seen)
+        self._inflight = {}  # key -> lock held while one session computes it.
+        self._pinned = set()  # Keys kept regardless of references.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _compute(self, model, params, compute):
+        if self.backing is not None:
+            return self.backing.get_or_compute(model, params, compute)
+        return compute(model, params)
+
+    def get_or_compute(self, model, params, compute, session_id=None, slot=None):
+        """Returns (shared result, error); concurrent requests for the same terms compute it once."""
+        key = contract_key(model, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._hold(session_id, slot, key)
+                return _view(entry[0]), None
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                result, error_msg = self._compute(model, params, compute)
+                with self._lock:
+                    self._inflight.pop(key, None)
+                    self.misses += 1
+                    if error_msg:
+                        return None, error_msg
+                    self._entries[key] = (result, result_nbytes(result))
+                    self._hold(session_id, slot, key)
+                    self._evict()
+                return _view(result), None
+
+        with self._lock:
+            self.hits += 1
+            self._hold(session_id, slot, key)
+        return _view(entry[0]), None
+
+    def pin(self, model, params, compute):
+        """Computes (or loads) a result and keeps it in the store for the life of the server."""
+        result, error_msg = self.get_or_compute(model, params, compute)
+        if error_msg is None:
+            with self._lock:
+                self._pinned.add(contract_key(model, params))
+        return result, error_msg
+
+    def session_handle(self, session_id):
+        """Object that releases ``session_id``'s references once the session drops it."""
+        handle = _SessionHandle()
+        weakref.finalize(handle, self.release, session_id)
+        return handle
+
+    def _hold(self, session_id, slot, key):
+        if session_id is not None:
+            self._holders[(session_id, slot)] = (key, time.monotonic())
+
+    def refcount(self, key):
+        """Number of live session slots currently holding ``key``."""
+        with self._lock:
+            self._expire()
+            return sum(held == key for held, _ in self._holders.values())
+
+    def release(self, session_id):
+        """Drops every reference held by a session (e.g. when it ends)."""
+        with self._lock:
+            for holder in [h for h in self._holders if h[0] == session_id]:
+                del self._holders[holder]
+            self._evict()
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.session_ttl
+        for holder in [h for h, (_, seen) in self._holders.items() if seen < cutoff]:
+            del self._holders[holder]
+
+    def _evict(self):
+        """Drops unreferenced entries, least recently used first, until the store fits its budget."""
+        total = sum(size for _, size in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        self._expire()
+        held = {key for key, _ in self._holders.values()} | self._pinned
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            if key not in held:
+                total -= self._entries.pop(key)[1]
+
+    def stats(self):
+        """Entries, bytes held, live references and hit/miss counts."""
+        with self._lock:
+            self._expire()
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(size for _, size in self._entries.values()),
+                'references': len(self._holders),
+                'pinned': len(self._pinned),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
@@ -0,0 +1,137 @@
+"""Batch invariant checks for schedules and journal frames.
+
+Every check is a single grouped pass over the frame, so a whole portfolio (one frame holding
+many contracts, keyed by ``Contract_ID``) validates as fast as one contract. Each check
+returns only the violating rows in a common layout: Check, Contract, Period, Expected, Actual,
+Difference.
+"""
+import numpy as np
+import pandas as pd
+
+CONTRACT_KEY = 'Contract_ID'
+TOLERANCE = 0.005
+PREPAID_ACCOUNT = 14001
+VIOLATION_COLUMNS = ['Check', 'Contract', 'Period', 'Expected', 'Actual', 'Difference']
+
+
+def contract_keys(df):
+    """Portfolio frames carry Contract_ID; single-deal frames fall back to License (or one group)."""
+    for col in (CONTRACT_KEY, 'License'):
+        if col in df.columns:
+            return df[col]
+    return pd.Series('', index=df.index)
+
+
+def _violations(check, contract, period, expected, actual, tolerance):
+    expected = np.asarray(expected, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    difference = actual - expected
+    failed = np.abs(difference) > tolerance
+    return pd.DataFrame({
+        'Check': check,
+        'Contract': np.asarray(contract)[failed],
+        'Period': np.asarray(period)[failed],
+        'Expected': expected[failed].round(2),
+        'Actual': actual[failed].round(2),
+        'Difference': difference[failed].round(2),
+    }, columns=VIOLATION_COLUMNS)
+
+
+def check_journal_balance(journal_df, tolerance=TOLERANCE):
+    """Debits must equal credits per contract, date and JE_Type."""
+    if journal_df.empty:
+        return pd.DataFrame(columns=VIOLATION_COLUMNS)
+
+    totals = pd.DataFrame({
+        'Contract': contract_keys(journal_df).to_numpy(),
+        'Date': journal_df['Date'].to_numpy(),
+        'JE_Type': journal_df['JE_Type'].to_numpy(),
+        'Debit': journal_df['Debit'].to_numpy(dtype=float),
+        'Credit': journal_df['Credit'].to_numpy(dtype=float),
+    }).groupby(['Contract', 'Date', 'JE_Type'], sort=False).sum().reset_index()
+
+    period = totals['Date'].astype(str) + ' ' + totals['JE_Type'].astype(str)
+    return _violations('JOURNAL_BALANCE', totals['Contract'], period, totals['Debit'], totals['Credit'], tolerance)
+
+
+def _last_rows(schedule_df):
+    """Final period of every contract in the frame."""
+    keys = contract_keys(schedule_df)
+    last = ~keys.duplicated(keep='last')
+    return schedule_df.loc[last.to_numpy()], keys[last]
+
+
+def check_amortization_closes(schedule_df, tolerance=TOLERANCE):
+    """Fixed-fee schedules must amortize the full cost: ending NBV ties to zero."""
+    if schedule_df.empty:
+        return pd.DataFrame(columns=VIOLATION_COLUMNS)
+
+    last, contracts = _last_rows(schedule_df)
+    return _violations(
+        'NBV_CLOSES_TO_ZERO', contracts, last['Posting_Date'],
+        np.zeros(len(last)), last['Net_Book_Value_NBV'], tolerance
+    )
+
+
+def check_prepaid_closes(journal_df, amortization_df, tolerance=TOLERANCE):
+    """Fixed-fee journals must clear the prepaid: 14001 debits less credits close to zero per contract."""
+    if journal_df.empty or amortization_df.empty:
+        return pd.DataFrame(columns=VIOLATION_COLUMNS)
+
+    keys = contract_keys(journal_df)
+    # A single-deal schedule carries no key: every journal line belongs to that deal.
+    fixed_fee = (keys.isin(amortization_df[CONTRACT_KEY].unique()).to_numpy() if CONTRACT_KEY in amortization_df.columns
+                 else np.ones(len(journal_df), dtype=bool))
+    prepaid = fixed_fee & (journal_df['Account_Number'].to_numpy() == PREPAID_ACCOUNT)
+    net = (journal_df['Debit'] - journal_df['Credit']).to_numpy(dtype=float)[prepaid]
+    grouped = pd.DataFrame({'Contract': keys.to_numpy()[prepaid], 'Net': net, 'Date': journal_df['Date'].to_numpy()[prepaid]})
+    balances = grouped.groupby('Contract', sort=False).agg(Net=('Net', 'sum'), Date=('Date', 'max')).reset_index()
+    return _violations(
+        'PREPAID_CLOSES_TO_ZERO', balances['Contract'], balances['Date'],
+        np.zeros(len(balances)), balances['Net'], tolerance
+    )
+
+
+def check_mg_ties(schedule_df, mg_amount, tolerance=TOLERANCE):
+    """MG schedules: usage splits into drawdown plus overage, and drawdown plus ending prepaid ties to the MG.
+
+    ``mg_amount`` is a scalar for a single deal, or a Series of MG amounts indexed by Contract_ID.
+    """
+    if schedule_df.empty:
+        return pd.DataFrame(columns=VIOLATION_COLUMNS)
+
+    keys = contract_keys(schedule_df)
+    split = _violations(
+        'MG_USAGE_SPLIT', keys, schedule_df['Posting_Date'], schedule_df['Usage_Expense'],
+        schedule_df['Prepaid_Amortization'].to_numpy(dtype=float) + schedule_df['Overage_Expense'].to_numpy(dtype=float),
+        tolerance
+    )
+
+    grouped = schedule_df['Prepaid_Amortization'].groupby(keys.to_numpy(), sort=False)
+    drawdown, periods = grouped.sum(), grouped.size()
+    last, contracts = _last_rows(schedule_df)
+    if isinstance(mg_amount, pd.Series):
+        expected = mg_amount.reindex(contracts.to_numpy()).to_numpy(dtype=float)
+    else:
+        expected = np.full(len(last), float(mg_amount))
+    ties = _violations(
+        'MG_TIES_TO_GUARANTEE', contracts, last['Posting_Date'], expected,
+        drawdown.reindex(contracts.to_numpy()).to_numpy() + last['Ending_Prepaid'].to_numpy(dtype=float),
+        # Each period's drawdown is rounded to cents, so allow half a cent of drift per period.
+        tolerance * periods.reindex(contracts.to_numpy()).to_numpy()
+    )
+    return pd.concat([split, ties], ignore_index=True)
+
+
+def validate_batch(journal_df=None, amortization_df=None, mg_schedule_df=None, mg_amount=None, tolerance=TOLERANCE):
+    """Runs every applicable check in one pass and returns the combined violations (empty when clean)."""
+    results = [pd.DataFrame(columns=VIOLATION_COLUMNS)]
+    if journal_df is not None:
+        results.append(check_journal_balance(journal_df, tolerance))
+    if amortization_df is not None:
+        results.append(check_amortization_closes(amortization_df, tolerance))
+        if journal_df is not None:
+            results.append(check_prepaid_closes(journal_df, amortization_df, tolerance))
+    if mg_schedule_df is not None and mg_amount is not None:
+        results.append(check_mg_ties(mg_schedule_df, mg_amount, tolerance))
+    return pd.concat([r for r in results if not r.empty] or results[:1], ignore_index=True)